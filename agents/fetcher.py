@@ -1,61 +1,136 @@
 # agents/fetcher.py
-from tools.github_tools import parse_repo_url, get_repo_info, get_repo_tree, get_file_content
-from rag.code_store import build_code_index
-from config import MAX_FILE_SIZE
+import json
+from tools.github_tools import (parse_repo_url, parse_pr_number, get_repo_info, get_repo_tree,
+                                get_pull_request, get_pull_files, fetch_files, fetch_archive_files)
+from tools.blob_cache import get_blob, put_blob
+from rag.code_store import prune_code_index
+from rag.ast_chunker import add_symbols
+from tools.file_store import put_text
+from metrics import timed
+from config import ARCHIVE_THRESHOLD
 
-def fetcher_agent(state: dict) -> dict:
-    print("\n[FETCHER] Fetching repository files from GitHub...")
+def load_blobs(owner: str, repo: str, blobs: list[dict], ref: str):
+    """
+    Yields (blob, content) for [{"path", "sha"}], one file at a time:
+    cached SHAs are read from the blob cache, the rest are downloaded and
+    cached as they arrive, so the repo is never in memory all at once.
+    """
+    missing = []
+    for b in blobs:
+        content = get_blob(b["sha"])
+        if content is None:
+            missing.append(b)
+        else:
+            yield b, content
+    print(f"Blob cache: {len(blobs) - len(missing)} cached, {len(missing)} to download")
 
-    repo_url          = state["pr_url"]
-    owner, repo       = parse_repo_url(repo_url)
-    repo_info         = get_repo_info(owner, repo)
+    # Big downloads: one streamed tarball beats hundreds of contents-API calls
+    by_path       = {b["path"]: b for b in missing}
+    missing_paths = list(by_path)
+    if len(missing) > ARCHIVE_THRESHOLD:
+        loaded = fetch_archive_files(owner, repo, ref, missing_paths)
+    else:
+        loaded = fetch_files(owner, repo, missing_paths, ref)
+    for path, content in loaded:
+        if content:
+            put_blob(by_path[path]["sha"], content)
+        yield by_path[path], content
 
-    print(f"Repo: {repo_info['name']} | ⭐ {repo_info['stars']} stars")
-    print(f"Language: {repo_info['language']}")
-    print(f"{repo_info['description']}")
+def file_ref(f: dict, owner: str, repo: str, ref: str) -> dict:
+    """What the graph state keeps per file: metadata + where to load the body (tools/file_store.py)."""
+    return {**f, "repo": f"{owner}/{repo}", "ref": ref}
 
-    # Get all file paths from all folders
-    all_paths = get_repo_tree(owner, repo, repo_info["default_branch"])
-    print(f"\nLoading {len(all_paths)} code files...")
-
-    # Load all files
-    files = []
-    for path in all_paths:
-        content = get_file_content(owner, repo, path)
-        if content.strip():
-            files.append({
-                "filename":  path,
+def fetch_pull_request(owner: str, repo: str, pr_number: int) -> tuple[dict, list, dict]:
+    """PR metadata, changed-file references (head content is cached, not returned) and symbols."""
+    pr        = get_pull_request(owner, repo, pr_number)
+    changed   = [f for f in get_pull_files(owner, repo, pr_number) if f["status"] != "removed"]
+    print(f"PR #{pr_number}: {pr['title']} | {len(changed)} changed code files")
+
+    by_path, kept, symbols = {f["filename"]: f for f in changed}, set(), {}
+    for b, content in load_blobs(owner, repo, [{"path": f["filename"], "sha": f["sha"]} for f in changed],
+                                 pr["head_sha"]):
+        if content and content.strip():
+            kept.add(b["path"])
+            add_symbols(symbols, b["path"], content, b["sha"])
+    files = [file_ref(f, owner, repo, pr["head_sha"]) for f in changed if f["filename"] in kept]
+
+    pr_info = {
+        **pr,
+        "title":         f"PR #{pr_number}: {pr['title']}",
+        "changed_files": len(files)
+    }
+    return pr_info, files, symbols
+
+def fetch_repository(owner: str, repo: str, repo_info: dict) -> tuple[dict, list, dict]:
+    """Whole default branch: references to every code file, and their symbols."""
+    # Get all code blobs (path + sha) from all folders
+    branch = repo_info["default_branch"]
+    blobs  = get_repo_tree(owner, repo, branch)
+    print(f"\nLoading {len(blobs)} code files...")
+
+    entries, symbols = {}, {}
+    for b, content in load_blobs(owner, repo, blobs, branch):
+        if content and content.strip():
+            entries[b["path"]] = file_ref({
+                "filename":  b["path"],
+                "sha":       b["sha"],
                 "status":    "existing",
                 "additions": content.count("\n"),
                 "deletions": 0,
-                "content":   content[:MAX_FILE_SIZE],
                 "patch":     ""
-            })
+            }, owner, repo, branch)
+            add_symbols(symbols, b["path"], content, b["sha"])
 
-    print(f"[FETCHER] Loaded {len(files)} files")
+    # Keep tree order so reports are stable between runs
+    files = [entries[b["path"]] for b in blobs if b["path"] in entries]
 
-    #Build RAG index from all files
-    vectorstore = build_code_index(files, owner, repo)
+    # Drop index chunks of deleted/changed files; new chunks are embedded per file later
+    removed = prune_code_index(files, owner, repo)
+    print(f"[RAG] Removed {removed} stale chunks")
 
     pr_info = {
         "title":         f"Repository Review: {repo_info['name']}",
         "description":   repo_info["description"],
         "author":        repo_info["owner"],
-        "base_branch":   repo_info["default_branch"],
-        "head_branch":   repo_info["default_branch"],
+        "base_branch":   branch,
+        "head_branch":   branch,
         "changed_files": len(files),
         "additions":     sum(f["additions"] for f in files),
         "deletions":     0,
         "state":         "open"
     }
+    return pr_info, files, symbols
+
+@timed("fetch")
+def fetcher_agent(state: dict) -> dict:
+    print("\n[FETCHER] Fetching repository files from GitHub...")
+
+    repo_url          = state["pr_url"]
+    owner, repo       = parse_repo_url(repo_url)
+    pr_number         = parse_pr_number(repo_url)
+    repo_info         = get_repo_info(owner, repo)
+
+    print(f"Repo: {repo_info['name']} | ⭐ {repo_info['stars']} stars")
+    print(f"Language: {repo_info['language']}")
+    print(f"{repo_info['description']}")
+
+    # PR URL → review only the diff; repo URL → review the whole default branch
+    # Symbols (where every function/class lives) are indexed locally while files stream in
+    if pr_number:
+        pr_info, files, symbols = fetch_pull_request(owner, repo, pr_number)
+    else:
+        pr_info, files, symbols = fetch_repository(owner, repo, repo_info)
+
+    print(f"[FETCHER] Loaded {len(files)} files")
+    print(f"[FETCHER] Indexed {sum(len(v) for v in symbols.values())} symbols")
 
     return {
-        **state,
         "pr_info":     pr_info,
         "files":       files,
         "owner":       owner,
         "repo":        repo,
-        "pr_number":   0,
+        "pr_number":   pr_number,
         "repo_info":   repo_info,
-        "vectorstore": vectorstore
+        # Every file task needs it: tasks carry this key, not the whole index
+        "symbols":     put_text(json.dumps(symbols, sort_keys=True))
     }
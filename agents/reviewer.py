@@ -1,6 +1,11 @@
 # agents/reviewer.py
+import re
 from langchain_core.prompts import ChatPromptTemplate
-from llm import get_llm
+from llm import get_llm, invoke_safe, invoke_all, is_failed
+from tools.context_packer import count_tokens, prompt_budget, allocate, fit, split_windows
+from report.findings import REVIEW_SECTIONS, split_sections, is_empty
+from rag.code_store import related_code
+from tools.diff_tools import review_content
 
 llm = get_llm(temperature=0.1)
 
@@ -85,37 +90,105 @@ FIX RULES:
 {content}
 ──── CODE END ────
 
+RELATED CODE FROM OTHER FILES (reference only — do NOT review it):
+{related}
+
 Review ONLY the code between CODE START and CODE END.
 Begin your review now:""")
 ])
 
-def reviewer_agent(state: dict) -> dict:
-    """Reviews each file using RAG-retrieved chunks."""
-    print("\n[REVIEWER] Analysing code...")
+BUNDLE_PROMPT = ChatPromptTemplate.from_messages([
+    REVIEW_PROMPT.messages[0],
+    ("human", """FILES: {filenames}
 
-    pr_info     = state["pr_info"]
-    files       = state["files"]
-    vectorstore = state.get("vectorstore")
-    reviews     = {}
-    chain       = REVIEW_PROMPT | llm
+{content}
 
-    for f in files:
-        print(f"Reviewing: {f['filename']}")
-
-        #RAG if available
-        if vectorstore:
-            from rag.code_store import query_code
-            query   = f"functions classes logic in {f['filename']}"
-            content = query_code(vectorstore, query, k=4)
-        else:
-            content = (f["content"] or f["patch"])[:3000]
-
-        result = chain.invoke({
-            "repo_title": pr_info["title"],
-            "filename":   f["filename"],
-            "content":    content
-        })
-        reviews[f["filename"]] = result.content
+Review EACH file separately. For every file, start with a line
+=== FILE: <file name> ===
+followed by the full OUTPUT FORMAT for that file only.
+Begin your review now:""")
+])
 
-    print(f"[REVIEWER] Reviewed {len(reviews)} files")
-    return {**state, "reviews": reviews}
+FILE_HEADER_RE = re.compile(r"^\W*FILE:\s*`?([^`=*\s]+)`?\W*$", re.M)
+
+def bundle_budget() -> int:
+    """Tokens of code one bundled review prompt can carry."""
+    return int(prompt_budget(BUNDLE_PROMPT) * 0.8)
+
+def merge_reviews(parts: list[str]) -> str:
+    """Reduce per-window reviews into one review in the usual section layout."""
+    merged   = {name: [] for name in REVIEW_SECTIONS}
+    leftover = []
+    for i, part in enumerate(parts, 1):
+        sections = {} if is_failed(part) else split_sections(part)
+        if not sections:
+            leftover.append(f"(window {i}) {part.strip()}")
+            continue
+        for name, body in sections.items():
+            if not is_empty(body):
+                merged[name].append(body)
+
+    out = [f"_Large file: reviewed in {len(parts)} overlapping windows._", ""]
+    for name in REVIEW_SECTIONS:
+        out += [name, "\n".join(merged[name]) or "None found.", ""]
+    out += leftover
+    return "\n".join(out).strip()
+
+def review_file(f: dict, vectorstore, symbols: dict, repo_title: str) -> str:
+    """
+    Reviews one file; cross-file context comes from the symbol index.
+    Files too big for the context window are reviewed in overlapping
+    windows (in parallel) and the window reviews are merged.
+    """
+    print(f"Reviewing: {f['filename']}")
+
+    # PR mode: only the changed hunks plus surrounding context
+    code     = review_content(f)
+    related  = related_code(f, vectorstore, symbols) if vectorstore else ""
+    budget   = prompt_budget(REVIEW_PROMPT) - count_tokens(f["filename"])
+    shares   = allocate(budget, {"content": code, "related": related},
+                        {"content": 0.8, "related": 0.2})
+    chain    = REVIEW_PROMPT | llm
+    metadata = {"stage": "review", "file": f["filename"]}
+
+    def prompt_input(content: str, related_budget: int) -> dict:
+        return {
+            "repo_title": repo_title,
+            "filename":   f["filename"],
+            "content":    content,
+            "related":    fit(related, related_budget) if related else "None."
+        }
+
+    if count_tokens(code) <= shares["content"]:
+        return invoke_safe(chain, prompt_input(code, shares["related"]), metadata)
+
+    window_budget = int(budget * 0.8)
+    windows       = split_windows(code.splitlines(), window_budget)
+    print(f"   {f['filename']}: {len(windows)} windows")
+    parts = invoke_all(chain, [prompt_input(w, budget - window_budget) for w in windows],
+                       metadata=metadata)
+    return merge_reviews(parts)
+
+def review_bundle(files: list[dict], vectorstore, symbols: dict, repo_title: str) -> dict[str, str]:
+    """
+    Several small files in one prompt; the answer is split back per file.
+    Files the model skipped or mislabelled get their own review_file call.
+    """
+    names = [f["filename"] for f in files]
+    print(f"Reviewing bundle: {', '.join(names)}")
+    content = "\n\n".join(f"──── FILE: {f['filename']} ────\n{review_content(f)}" for f in files)
+    answer  = invoke_safe(BUNDLE_PROMPT | llm, {"filenames": ", ".join(names), "content": content},
+                          {"stage": "review", "file": ", ".join(names)})
+
+    reviews = {}
+    if not is_failed(answer):
+        headers = list(FILE_HEADER_RE.finditer(answer))
+        for header, nxt in zip(headers, headers[1:] + [None]):
+            name = header.group(1)
+            body = answer[header.end():nxt.start() if nxt else len(answer)].strip()
+            if name in names and split_sections(body):
+                reviews[name] = body
+    for f in files:
+        if f["filename"] not in reviews:
+            reviews[f["filename"]] = review_file(f, vectorstore, symbols, repo_title)
+    return reviews
@@ -6,7 +6,12 @@ from config import LM_STUDIO_URL, LM_MODEL
 from langchain_openai import ChatOpenAI
 from config import LM_STUDIO_URL, LM_MODEL
 
-from llm import get_llm
+from llm import get_llm, invoke_safe, is_failed
+from tools.diff_tools import review_content, line_excerpt
+from tools.context_packer import count_tokens, prompt_budget, allocate, fit
+from report.findings import Finding, split_sections
+from metrics import inc
+from config import SUGGEST_MARGIN_LINES
 llm = get_llm(temperature=0.2)
 
 SUGGEST_PROMPT = ChatPromptTemplate.from_messages([
@@ -33,32 +38,63 @@ SUGGEST_PROMPT = ChatPromptTemplate.from_messages([
 CODE REVIEW FINDINGS:
 {review}
 
-ORIGINAL FILE CONTENT:
+ORIGINAL CODE (cited lines marked with '>'):
 {content}
 
 Provide specific fix suggestions with before/after code:""")
 ])
 
-def suggester_agent(state: dict) -> dict:
-    """Generates concrete fix suggestions for each reviewed file."""
-    print("\n[SUGGESTER] Generating fix suggestions...")
+def actionable(findings: list[Finding]) -> list[Finding]:
+    """Findings worth a fix: everything except positive observations."""
+    return [f for f in findings if f.severity != "info"]
 
-    files      = state["files"]
-    reviews    = state["reviews"]
-    suggestions = {}
-    chain      = SUGGEST_PROMPT | llm
-
-    for f in files:
-        filename = f["filename"]
-        if filename not in reviews:
+def cited_lines(content: str, findings: list[Finding]) -> set[int]:
+    """Line numbers the findings point at; a snippet without a line number is looked up."""
+    lines, cited = content.splitlines(), set()
+    for finding in findings:
+        if finding.line:
+            cited.add(finding.line)
             continue
-        print(f"Suggesting fixes: {filename}")
-        result = chain.invoke({
-            "filename": filename,
-            "review":   reviews[filename],
-            "content":  f["content"] or f["patch"]
-        })
-        suggestions[filename] = result.content
+        first = finding.code.strip().splitlines()[0].strip() if finding.code.strip() else ""
+        if first:
+            cited.update(n for n, line in enumerate(lines, 1) if first in line)
+    return cited
+
+def format_findings(findings: list[Finding]) -> str:
+    out = []
+    for f in findings:
+        where = f"Line {f.line}" if f.line else "Line ?"
+        out.append(f"- [{f.category}] {where}: {f.message}")
+        if f.code:
+            out.append(f"  Code: {f.code}")
+        if f.fix:
+            out.append(f"  Suggested Fix: {f.fix}")
+    return "\n".join(out)
+
+def suggest_file(f: dict, review: str, findings: list[Finding]) -> str | None:
+    """
+    Generates concrete fix suggestions for one reviewed file, from its parsed
+    findings and only the lines they cite (plus a small margin).
+    """
+    # Nothing to fix if the review itself failed or found nothing actionable
+    if is_failed(review):
+        return None
+    todo = actionable(findings)
+    if not todo and split_sections(review):
+        inc("review_suggest_skipped_total", 1, "Files with nothing for the suggester")
+        return None
+    print(f"Suggesting fixes: {f['filename']} ({len(todo)} findings)")
 
-    print(f"[SUGGESTER] Generated suggestions for {len(suggestions)} files")
-    return {**state, "suggestions": suggestions}
+    # Cited windows only; whole (reviewed) content when nothing can be located.
+    # A review that ignored the output format is passed through as-is.
+    code   = (line_excerpt(f["content"], cited_lines(f["content"], todo), SUGGEST_MARGIN_LINES, mark=">")
+              or review_content(f))
+    issues = format_findings(todo) if todo else review
+    budget = prompt_budget(SUGGEST_PROMPT) - count_tokens(f["filename"])
+    shares = allocate(budget, {"review": issues, "content": code},
+                      {"review": 0.4, "content": 0.6})
+    return invoke_safe(SUGGEST_PROMPT | llm, {
+        "filename": f["filename"],
+        "review":   fit(issues, shares["review"]),
+        "content":  fit(code, shares["content"])
+    }, metadata={"stage": "suggest", "file": f["filename"]})
@@ -1,9 +1,18 @@
 # agents/summariser.py
 from langchain_core.prompts import ChatPromptTemplate
 from datetime import datetime
-from llm import get_llm
-
-llm = get_llm(temperature=0.1)
+import os
+from llm import get_llm, get_llm_cache, invoke_all, is_failed
+from tools.context_packer import count_tokens, prompt_budget, fit
+from report.findings import dedupe_findings, write_json, write_sarif
+from report.writer import ReportWriter
+from tools.file_store import get_text
+from graph.events import emit
+from metrics import timed
+from config import DIGEST_TOKENS
+
+llm        = get_llm(temperature=0.1)
+digest_llm = get_llm(temperature=0.1, max_tokens=DIGEST_TOKENS)
 
 SUMMARY_PROMPT = ChatPromptTemplate.from_messages([
     ("system", """You are a tech lead writing a final code review summary.
@@ -34,48 +43,145 @@ REVIEW HIGHLIGHTS:
 Write the final summary:""")
 ])
 
-def truncate_reviews(reviews: dict, max_chars: int = 1500) -> str:
+DIGEST_PROMPT = ChatPromptTemplate.from_messages([
+    ("system", """You condense code review notes for a tech lead.
+    Keep ONLY the most severe concrete problems (bugs, security, performance),
+    each as one bullet prefixed with its file name. Drop positive notes,
+    readability nits and anything marked "None found."
+    At most 8 bullets. No preamble."""),
+    ("human", """{reviews}
+
+Condensed bullets:""")
+])
+
+def _group(items: list[str], budget: int) -> list[str]:
+    """Greedy: consecutive items packed into groups of at most `budget` tokens."""
+    groups, current, used = [], [], 0
+    for item in items:
+        cost = count_tokens(item) + 2
+        if current and used + cost > budget:
+            groups.append("\n\n".join(current))
+            current, used = [], 0
+        current.append(item)
+        used += cost
+    if current:
+        groups.append("\n\n".join(current))
+    return groups
+
+def condense_reviews(reviews: dict, budget: int) -> str:
     """
-    Hard cap total review text to fit in 4096 token context.
-    Takes equal slice from each file review.
+    Tree-reduce: digest groups of file reviews in parallel, then digests of
+    digests, level by level, until everything fits in `budget` tokens.
+    Group sizes come from the digest prompt's own token budget.
+    `reviews` maps filename -> file-store key; each review is loaded and cut
+    to its group budget one at a time.
     """
     if not reviews:
         return "No reviews."
-    per_file  = max_chars // max(len(reviews), 1)
-    condensed = []
-    for fname, review in reviews.items():
-        # Take only first N chars and cut at last newline
-        snippet = review[:per_file]
-        last_nl = snippet.rfind("\n")
-        if last_nl > per_file // 2:
-            snippet = snippet[:last_nl]
-        condensed.append(f"FILE: {fname}\n{snippet.strip()}")
-    return "\n\n".join(condensed)
-
+    group_budget = prompt_budget(DIGEST_PROMPT, completion=DIGEST_TOKENS)
+    items = [fit(f"FILE: {fname}\n{get_text(key).strip()}", group_budget)
+             for fname, key in reviews.items()]
+    chain = DIGEST_PROMPT | digest_llm
+    level = 0
+
+    while count_tokens("\n\n".join(items)) > budget:
+        groups = _group(items, group_budget)
+        if len(groups) >= len(items) and level > 0:
+            # no progress possible: digests are already one per group
+            return fit("\n\n".join(items), budget)
+        level += 1
+        print(f"   Summary level {level}: {len(items)} items → {len(groups)} digests")
+        digests = invoke_all(chain, [{"reviews": g} for g in groups],
+                             metadata={"stage": "digest", "level": level})
+        items   = [fit(g, DIGEST_TOKENS) if is_failed(d) else d.strip()
+                   for g, d in zip(groups, digests)]
+    return "\n\n".join(items)
+
+def stats_footer(state: dict) -> str:
+    """Cache / throughput numbers for the end of the report."""
+    lines = []
+    embed = state.get("embed_stats")
+    if embed:
+        lines.append(f"- Embeddings: {embed['hits']} cache hits, {embed['misses']} misses, "
+                     f"{embed['per_second']:.1f} embeddings/s")
+    start = state.get("cache_start")
+    if start:
+        now  = get_llm_cache().snapshot()
+        hits = now["hits"] - start["hits"]
+        miss = now["misses"] - start["misses"]
+        # counters are per process: a run resumed in another process has no meaningful delta
+        if hits >= 0 and miss >= 0:
+            lines.append(f"- LLM cache: {hits} hits, {miss} misses")
+    if not lines:
+        return ""
+    return "\n## Run Statistics\n" + "\n".join(lines) + "\n"
+
+def findings_overview(findings: list) -> str:
+    """Severity counts plus problems that show up in more than one file."""
+    if not findings:
+        return ""
+    counts = {}
+    for f in findings:
+        counts[f.severity] = counts.get(f.severity, 0) + 1
+    lines = ["", "## Findings Overview", "| Severity | Findings |", "|---|---|"]
+    lines += [f"| {sev} | {counts[sev]} |" for sev in ("high", "medium", "low", "info") if sev in counts]
+    repeated = [f for f in findings if f.also_in and f.severity != "info"]
+    if repeated:
+        lines += ["", "**Repeated across files:**"]
+        lines += [f"- {f.category}: {f.message} — `{f.filename}` and {len(f.also_in)} more"
+                  for f in repeated[:10]]
+    return "\n".join(lines) + "\n\n---\n"
+
+def skipped_overview(skipped: list) -> str:
+    """Files triage kept away from the model, with the reason."""
+    if not skipped:
+        return ""
+    lines = ["", "## Skipped by Triage", "| File | Reason |", "|---|---|"]
+    lines += [f"| `{s['filename']}` | {s['reason']} |" for s in skipped]
+    return "\n".join(lines) + "\n\n---\n"
+
+def duplicates_overview(duplicates: dict) -> str:
+    """Groups of copies that were reviewed once, through their representative."""
+    if not duplicates:
+        return ""
+    lines = ["", "## Duplicate Files", "| Reviewed | Copies (similarity) |", "|---|---|"]
+    lines += [f"| `{rep}` | " + ", ".join(f"`{m['filename']}` ({m['similarity']:.0%})" for m in members) + " |"
+              for rep, members in duplicates.items()]
+    return "\n".join(lines) + "\n\n---\n"
+
+@timed("summarise")
 def summariser_agent(state: dict) -> dict:
     print("\n[SUMMARISER] Writing final report...")
+    emit("summarising", files=len(state.get("reviews") or {}))
 
     pr_info     = state["pr_info"]
-    reviews     = state["reviews"]
-    suggestions = state.get("suggestions", {})
+    reviews     = state.get("reviews") or {}
 
-    #Hard truncate to stay under 4096 tokens
-    condensed = truncate_reviews(reviews, max_chars=1500)
+    # Reviews arrive from parallel workers in completion order — report in file order
+    order   = [f["filename"] for f in state["files"] if f["filename"] in reviews]
+    reviews = {fname: reviews[fname] for fname in order}
+
+    # Hierarchical digest of all reviews, sized to the summary prompt's budget
+    budget    = (prompt_budget(SUMMARY_PROMPT)
+                 - count_tokens(pr_info["title"]) - count_tokens(str(pr_info["changed_files"])))
+    condensed = condense_reviews(reviews, budget)
 
     chain   = SUMMARY_PROMPT | llm
     summary = chain.invoke({
         "repo_title":    pr_info["title"],
         "changed_files": pr_info["changed_files"],
         "all_reviews":   condensed
-    })
+    }, config={"metadata": {"stage": "summary"}})
+    emit("summary", summary=summary.content)
 
     # ── Build full report ──
-    timestamp    = datetime.now().strftime("%Y-%m-%d %H:%M")
-    final_report = f"""#AI Code Review Report
+    findings = dedupe_findings(state.get("findings") or [])
+    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M")
+    header    = f"""#AI Code Review Report
 **Generated:** {timestamp}  
 **Repo:** {pr_info['title']}  
 **Author:** @{pr_info['author']}  
-**Files Reviewed:** {pr_info['changed_files']}  
+**Files Reviewed:** {len(reviews)} of {pr_info['changed_files']}  
 
 ---
 
@@ -83,14 +189,15 @@ def summariser_agent(state: dict) -> dict:
 {summary.content}
 
 ---
-
+{findings_overview(findings)}{duplicates_overview(state.get("duplicates"))}{skipped_overview(state.get("skipped"))}
 ## File-by-File Reviews
 """
-    for fname, review in reviews.items():
-        final_report += f"\n### `{fname}`\n{review}\n"
-        if fname in suggestions:
-            final_report += f"\n**💡 Fix Suggestions:**\n{suggestions[fname]}\n"
-        final_report += "\n---\n"
-
-    print("[SUMMARISER] Report complete!")
-    return {**state, "final_report": final_report}
+    # File sections were spooled by the workers; stitch them in file order
+    report_path = ReportWriter(state["report_path"]).finish(header, stats_footer(state))
+
+    base = os.path.splitext(report_path)[0]
+    write_json(findings, f"{base}.findings.json")
+    write_sarif(findings, f"{base}.sarif")
+
+    print(f"[SUMMARISER] Report complete! ({len(findings)} unique findings)")
+    return {"report_path": report_path}
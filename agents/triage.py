@@ -0,0 +1,218 @@
+# agents/triage.py
+import re
+import ast
+from report.findings import Finding, SEVERITY
+from tools.diff_tools import review_content
+from tools.context_packer import count_tokens
+from tools.dedup import group_duplicates
+from tools.file_store import with_content
+from agents.reviewer import bundle_budget
+from graph.events import emit
+from metrics import timed, inc
+from config import TRIAGE_ENABLED, TRIAGE_TRIVIAL_LINES, BUNDLE_FILE_TOKENS, DEDUP_ENABLED
+
+GENERATED_RE       = re.compile(r"auto-?generated|generated by|do not edit|@generated", re.I)
+GENERATED_SUFFIXES = ("_pb2.py", "_pb2_grpc.py", ".min.js")
+BRANCH_NODES       = (ast.If, ast.IfExp, ast.For, ast.AsyncFor, ast.While, ast.ExceptHandler,
+                      ast.With, ast.AsyncWith, ast.Assert, ast.comprehension, ast.match_case)
+FUNCTION_NODES     = (ast.FunctionDef, ast.AsyncFunctionDef)
+
+def _literal(node: ast.AST | None) -> bool:
+    try:
+        ast.literal_eval(node)
+        return True
+    except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+        return False
+
+def straight_line(stmt: ast.stmt) -> bool:
+    """Imports, docstrings and literal constants only: nothing at module level that runs code."""
+    if isinstance(stmt, (ast.Import, ast.ImportFrom, ast.Pass)):
+        return True
+    if isinstance(stmt, ast.Expr):
+        return isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str)
+    if isinstance(stmt, (ast.Assign, ast.AnnAssign)):
+        return stmt.value is None or _literal(stmt.value)
+    return False
+
+def complexity(node: ast.AST) -> int:
+    """McCabe-style cyclomatic complexity: 1 + decision points (nested functions count separately)."""
+    score = 1
+    stack = list(ast.iter_child_nodes(node))
+    while stack:
+        child = stack.pop()
+        if isinstance(child, FUNCTION_NODES + (ast.ClassDef, ast.Lambda)):
+            continue
+        if isinstance(child, BRANCH_NODES):
+            score += 1
+        elif isinstance(child, ast.BoolOp):
+            score += len(child.values) - 1
+        stack.extend(ast.iter_child_nodes(child))
+    return score
+
+def lint(tree: ast.AST) -> list[tuple[str, int, str]]:
+    """Obvious problems a parser can prove: (category, line, message)."""
+    issues = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ExceptHandler) and node.type is None:
+            issues.append(("BUGS", node.lineno, "Bare `except:` also catches KeyboardInterrupt/SystemExit"))
+        elif isinstance(node, FUNCTION_NODES):
+            for default in node.args.defaults + [d for d in node.args.kw_defaults if d]:
+                if isinstance(default, (ast.List, ast.Dict, ast.Set)):
+                    issues.append(("BUGS", default.lineno,
+                                   f"Mutable default argument in `{node.name}` is shared between calls"))
+        elif isinstance(node, ast.Assert) and isinstance(node.test, ast.Tuple):
+            issues.append(("BUGS", node.lineno, "`assert` on a tuple is always true"))
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in ("eval", "exec"):
+            issues.append(("SECURITY", node.lineno, f"`{node.func.id}()` executes arbitrary code"))
+        elif isinstance(node, ast.Compare) and any(
+                isinstance(op, (ast.Eq, ast.NotEq)) and isinstance(c, ast.Constant) and c.value is None
+                for op, c in zip(node.ops, node.comparators)):
+            issues.append(("READABILITY / MAINTAINABILITY", node.lineno, "Comparison to None with `==`/`!=`"))
+    return issues
+
+def analyse(f: dict) -> dict:
+    """Local, model-free facts about one file."""
+    content = f["content"]
+    lines   = content.splitlines()
+    code    = [l for l in lines if l.strip() and not l.lstrip().startswith("#")]
+    info = {
+        "filename":   f["filename"],
+        "lines":      len(lines),
+        "code_lines": len(code),
+        "tokens":     count_tokens(review_content(f)),
+        "generated":  (f["filename"].endswith(GENERATED_SUFFIXES)
+                       or bool(GENERATED_RE.search("\n".join(lines[:5])))),
+        "syntax_error": None,
+        "complexity": 0,
+        "lint":       [],
+        "straight_line": False
+    }
+    if not f["filename"].endswith(".py"):
+        return info
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError) as e:
+        info["syntax_error"] = (getattr(e, "lineno", None), getattr(e, "msg", str(e)))
+        return info
+
+    functions = [n for n in ast.walk(tree) if isinstance(n, FUNCTION_NODES)]
+    info["complexity"]    = sum(complexity(n) for n in functions) + complexity(tree)
+    info["lint"]          = lint(tree)
+    info["straight_line"] = all(straight_line(n) for n in tree.body)
+    return info
+
+def skip_reason(info: dict) -> str | None:
+    """Why a file is not worth an LLM call, or None. Anything with a provable problem is kept."""
+    if info["syntax_error"] or info["lint"]:
+        return None
+    if info["code_lines"] == 0:
+        return "empty"
+    if info["generated"]:
+        return "generated"
+    if info["straight_line"] and info["code_lines"] < TRIAGE_TRIVIAL_LINES:
+        return "trivial (imports / constants only)"
+    return None
+
+def risk(info: dict, f: dict) -> float:
+    """Higher = review first. Provable problems dominate, then branching, then size and churn."""
+    score  = 100 if info["syntax_error"] else 0
+    score += 10 * len(info["lint"])
+    score += info["complexity"]
+    score += info["code_lines"] / 50
+    if f.get("patch"):
+        score += (f.get("additions", 0) + f.get("deletions", 0)) / 10
+    return score
+
+def static_findings(info: dict) -> list[Finding]:
+    findings = []
+    if info["syntax_error"]:
+        line, message = info["syntax_error"]
+        findings.append(Finding(info["filename"], "BUGS", SEVERITY["BUGS"], line, "",
+                                f"Syntax error: {message}"))
+    for category, line, message in info["lint"]:
+        findings.append(Finding(info["filename"], category, SEVERITY[category], line, "", message))
+    return findings
+
+def plan_batches(ranked: list[tuple[int, dict]], budget: int) -> list[list[int]]:
+    """
+    Riskiest first. Small files are packed (in risk order) into bundles of
+    at most `budget` tokens that are reviewed in one prompt; the rest go alone.
+    """
+    batches, bundle, used = [], [], 0
+    for i, info in ranked:
+        if info["tokens"] > BUNDLE_FILE_TOKENS or info["syntax_error"]:
+            batches.append([i])
+            continue
+        if bundle and used + info["tokens"] > budget:
+            batches.append(bundle)
+            bundle, used = [], 0
+        bundle.append(i)
+        used += info["tokens"]
+    if bundle:
+        batches.append(bundle)
+    return batches
+
+def duplicate_groups(files: list[dict], groups: dict[int, list[dict]]) -> dict[str, list[dict]]:
+    """State form of group_duplicates: representative filename -> members (filename, index, similarity)."""
+    return {
+        files[rep]["filename"]: [{"filename": files[m["index"]]["filename"], **m} for m in members]
+        for rep, members in groups.items()
+    }
+
+@timed("triage")
+def triage_agent(state: dict) -> dict:
+    files = state["files"]
+
+    # Copies (vendored, copy-pasted, generated twice) are reviewed once, via their representative
+    groups  = group_duplicates(files) if DEDUP_ENABLED else {}
+    members = {m["index"]: rep for rep, ms in groups.items() for m in ms}
+    if members:
+        print(f"\n[DEDUP] {len(members)} files duplicate {len(groups)} others")
+        inc("review_triage_files_total", len(members), "Files handled by triage", outcome="duplicate")
+
+    if not TRIAGE_ENABLED:
+        return {"batches":    [[i] for i in range(len(files)) if i not in members],
+                "skipped":    [],
+                "duplicates": duplicate_groups(files, groups)}
+
+    print("\n[TRIAGE] Static analysis...")
+    infos, ranked, skipped, findings = {}, [], [], []
+    for i, f in enumerate(files):
+        infos[i] = analyse(with_content(f))  # one body in memory at a time
+        findings += static_findings(infos[i])
+
+    # A near-copy that does not even parse (when its representative does) is reviewed on its own
+    for i, rep in list(members.items()):
+        if infos[i]["syntax_error"] and not infos[rep]["syntax_error"]:
+            groups[rep] = [m for m in groups[rep] if m["index"] != i]
+            del members[i]
+
+    for i, f in enumerate(files):
+        if i in members:
+            continue
+        reason = skip_reason(infos[i])
+        if reason:
+            skipped.append({"filename": f["filename"], "reason": reason})
+            skipped += [{"filename": files[m["index"]]["filename"],
+                         "reason":   f"duplicate of `{f['filename']}` ({reason})"}
+                        for m in groups.pop(i, [])]
+        else:
+            ranked.append((i, infos[i], risk(infos[i], f)))
+
+    ranked.sort(key=lambda item: -item[2])
+    batches    = plan_batches([(i, info) for i, info, _ in ranked], bundle_budget())
+    duplicates = duplicate_groups(files, {rep: ms for rep, ms in groups.items() if ms})
+
+    bundled = sum(len(b) for b in batches if len(b) > 1)
+    inc("review_triage_files_total", len(skipped), "Files handled by triage", outcome="skipped")
+    inc("review_triage_files_total", bundled, "Files handled by triage", outcome="bundled")
+    print(f"[TRIAGE] {len(ranked)} to review in {len(batches)} prompts "
+          f"({bundled} bundled), {len(skipped)} skipped, "
+          f"{sum(len(ms) for ms in duplicates.values())} covered by a duplicate, {len(findings)} static findings")
+    for s in skipped:
+        print(f"   skip {s['filename']}: {s['reason']}")
+    reviewed = [files[i]["filename"] for b in batches for i in b]
+    emit("triaged", review=reviewed + [m["filename"] for name in reviewed for m in duplicates.get(name, [])],
+         skipped=[s["filename"] for s in skipped])
+
+    return {"batches": batches, "skipped": skipped, "findings": findings, "duplicates": duplicates}
@@ -1,27 +1,93 @@
 # api.py
+import json
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
-from graph.review_graph import run_review
+from graph.review_graph import stream_review
+from jobs import JobQueue, QueueFull
+from tools.github_tools import http_status
+from requests import HTTPError
+from metrics import render_prometheus, set_gauge
 
-app = FastAPI(title="AI Code Review API", version="1.0.0")
+app = FastAPI(title="AI Code Review API", version="1.1.0")
 
 app.add_middleware(CORSMiddleware, allow_origins=["*"],
                    allow_methods=["*"], allow_headers=["*"])
 
+queue = JobQueue(stream_review)
+
 class ReviewRequest(BaseModel):
     pr_url: str
 
 @app.get("/")
 def root():
-    return {"status": "Code Review API running", "endpoint": "POST /review"}
+    return {
+        "status":    "Code Review API running",
+        "endpoints": ["POST /review", "GET /jobs/{job_id}", "GET /jobs/{job_id}/events",
+                      "GET /jobs/{job_id}/result", "GET /metrics"],
+        "queued":    queue.depth()
+    }
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint."""
+    set_gauge("review_job_queue_depth", queue.depth(), "Queued + running review jobs")
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
 
-@app.post("/review")
+@app.post("/review", status_code=202)
 def review(request: ReviewRequest):
+    """Queue a review and return immediately with a job ID."""
     try:
-        report = run_review(request.pr_url)
-        return {"report": report, "status": "success"}
+        job, coalesced = queue.submit(request.pr_url)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "60"})
+    except HTTPError as e:
+        # GitHub said no to the URL (unknown repo / PR, no access): the client's problem, not ours
+        status = http_status(e) or 500
+        if status == 404:
+            raise HTTPException(status_code=404, detail=str(e))
+        if 400 <= status < 500:
+            raise HTTPException(status_code=400, detail=str(e))
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    return {"job_id": job["id"], "status": job["status"], "coalesced": coalesced}
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    return job
+
+@app.get("/jobs/{job_id}/events")
+def job_events(job_id: str):
+    """Server-Sent Events: per-stage / per-file progress and report sections as they finish."""
+    if queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+
+    def sse():
+        for event in queue.events(job_id):
+            if event is None:
+                yield ": keep-alive\n\n"
+            else:
+                yield f"event: {event['event']}\ndata: {json.dumps(event)}\n\n"
+
+    return StreamingResponse(sse(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str):
+    job = queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job")
+    if job["status"] == "failed":
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["status"] != "done":
+        raise HTTPException(status_code=409, detail=f"Job is {job['status']}")
+    with open(job["report_path"], encoding="utf-8") as f:
+        report = f.read()
+    return {"report": report, "report_path": job["report_path"], "status": "success"}
@@ -1,7 +1,8 @@
 # app.py
+import os
+import tempfile
 import streamlit as st
-from graph.review_graph import run_review
-from datetime import datetime
+from graph.review_graph import stream_review, default_report_path
 
 st.set_page_config(page_title="AI Code Reviewer",
                    page_icon="🤖", layout="wide")
@@ -27,18 +28,49 @@ with col1:
         if not pr_url:
             st.error("Please enter a PR URL")
         else:
-            with st.spinner("🤖 Agents working... (this may take 1-2 mins)"):
+            with st.status("🤖 Agents working...", expanded=True) as status:
                 try:
-                    report = run_review(pr_url)
-                    st.session_state["report"]  = report
+                    fname = (default_report_path() if save_report
+                             else os.path.join(tempfile.mkdtemp(), "review.md"))
+                    progress = st.progress(0.0)
+                    live     = st.container()
+                    total, done = 0, 0
+
+                    # Render each file's section the moment its worker finishes
+                    for event in stream_review(pr_url, fname):
+                        kind = event["event"]
+                        if kind == "started" and event["resumed"]:
+                            status.update(label="♻️ Resuming an unfinished review of this commit...")
+                        elif kind == "fetched":
+                            total = len(event["files"])
+                            status.update(label=f"📥 Fetched {total} files from {event['title']}")
+                        elif kind == "triaged":
+                            total = len(event["review"])
+                            status.update(label=f"🧮 Triage: reviewing {total} files, "
+                                                f"skipping {len(event['skipped'])}")
+                        elif kind == "reviewed":
+                            status.update(label=f"🔍 Reviewed {event['file']} "
+                                                f"({event['findings']} findings)")
+                        elif kind == "suggested":
+                            done += 1
+                            progress.progress(min(done / max(total, 1), 1.0))
+                            live.markdown(event["section"])
+                        elif kind == "summarising":
+                            status.update(label="📝 Writing executive summary...")
+                        elif kind == "summary":
+                            live.markdown(f"## Executive Summary\n{event['summary']}")
+                        elif kind == "done":
+                            fname = event["report_path"]  # a resumed run keeps its first path
+
+                    with open(fname, encoding="utf-8") as f:
+                        st.session_state["report"] = f.read()
                     st.session_state["pr_url"]  = pr_url
+                    status.update(label="✅ Review complete", state="complete", expanded=False)
 
                     if save_report:
-                        fname = f"review_{datetime.now().strftime('%Y%m%d_%H%M%S')}.md"
-                        with open(fname, "w", encoding="utf-8") as f:
-                            f.write(report)
                         st.success(f"Report saved to: {fname}")
                 except Exception as e:
+                    status.update(label="❌ Review failed", state="error")
                     st.error(f" Error: {str(e)}")
 
 with col2:
@@ -0,0 +1,118 @@
+# batch.py
+"""
+Nightly sweep: review many repositories in one process.
+
+    python batch.py repos.txt --out reports/
+
+repos.txt has one GitHub URL per line, optionally followed by a priority
+(higher runs first, default 0); blank lines and # comments are ignored.
+Repos run concurrently and share one GitHub session, the blob / embedding /
+LLM caches, the endpoint pool and the fair scheduler, so the sweep is bound
+by inference capacity. Writes one report per repo plus index.md / index.json.
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from graph.review_graph import run_review
+from tools.github_tools import parse_repo_url, parse_pr_number
+from scheduler import set_tenant
+from config import BATCH_REPOS
+
+def read_repos(path: str) -> list[tuple[str, int]]:
+    repos = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.split("#", 1)[0].strip()
+            if not line:
+                continue
+            url, _, priority = line.partition(" ")
+            repos.append((url, int(priority.strip() or 0)))
+    return repos
+
+def report_name(url: str) -> str:
+    owner, repo = parse_repo_url(url)
+    pr_number   = parse_pr_number(url)
+    return f"{owner}__{repo}" + (f"__pr{pr_number}" if pr_number else "")
+
+def report_summary(report_path: str) -> dict:
+    """Verdict / score from the executive summary and finding counts by severity."""
+    summary = {"verdict": "", "score": "", "findings": {}}
+    with open(report_path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("## File-by-File"):
+                break
+            match = re.match(r"\W*(VERDICT|SCORE)\W*:\s*(.+)", line, re.I)
+            if match and not summary[match.group(1).lower()]:
+                summary[match.group(1).lower()] = match.group(2).strip(" *")
+    findings_path = os.path.splitext(report_path)[0] + ".findings.json"
+    if os.path.exists(findings_path):
+        with open(findings_path, encoding="utf-8") as f:
+            for finding in json.load(f):
+                summary["findings"][finding["severity"]] = summary["findings"].get(finding["severity"], 0) + 1
+    return summary
+
+def review_one(url: str, priority: int, out_dir: str) -> dict:
+    set_tenant(url, priority)
+    start = time.perf_counter()
+    entry = {"repo": url, "priority": priority}
+    try:
+        path = run_review(url, report_path=os.path.join(out_dir, report_name(url) + ".md"))
+        entry.update(status="done", report=os.path.relpath(path, out_dir), **report_summary(path))
+    except Exception as e:
+        entry.update(status="failed", error=f"{e.__class__.__name__}: {e}")
+    entry["seconds"] = round(time.perf_counter() - start, 1)
+    return entry
+
+def write_index(results: list[dict], out_dir: str) -> str:
+    with open(os.path.join(out_dir, "index.json"), "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    lines = [f"# Review Sweep — {datetime.now().strftime('%Y-%m-%d %H:%M')}", "",
+             f"{sum(r['status'] == 'done' for r in results)} of {len(results)} repositories reviewed.", "",
+             "| Repo | Verdict | Score | High | Medium | Low | Time | Report |",
+             "|---|---|---|---|---|---|---|---|"]
+    for r in results:
+        if r["status"] != "done":
+            lines.append(f"| {r['repo']} | ❌ {r['error']} | | | | | {r['seconds']}s | |")
+            continue
+        counts = r["findings"]
+        lines.append(f"| {r['repo']} | {r['verdict']} | {r['score']} | {counts.get('high', 0)} | "
+                     f"{counts.get('medium', 0)} | {counts.get('low', 0)} | {r['seconds']}s | "
+                     f"[{r['report']}]({r['report']}) |")
+    path = os.path.join(out_dir, "index.md")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return path
+
+def run_batch(repos: list[tuple[str, int]], out_dir: str, parallel: int = BATCH_REPOS) -> list[dict]:
+    """Review every repo (highest priority first, `parallel` at a time) and write the index."""
+    os.makedirs(out_dir, exist_ok=True)
+    ordered = sorted(repos, key=lambda r: -r[1])
+    results = []
+    with ThreadPoolExecutor(max_workers=parallel, thread_name_prefix="batch-repo") as pool:
+        futures = [pool.submit(review_one, url, priority, out_dir) for url, priority in ordered]
+        for future in as_completed(futures):
+            entry = future.result()
+            results.append(entry)
+            print(f"[BATCH] {len(results)}/{len(ordered)} {entry['repo']}: {entry['status']} "
+                  f"({entry['seconds']}s)")
+    # Index in priority / input order, not completion order
+    rank = {url: i for i, (url, _) in enumerate(ordered)}
+    results.sort(key=lambda r: rank[r["repo"]])
+    print(f"[BATCH] Index: {write_index(results, out_dir)}")
+    return results
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Review many GitHub repositories in one sweep")
+    parser.add_argument("repos", help="file with one GitHub URL [priority] per line")
+    parser.add_argument("--out", default=f"reviews_{datetime.now().strftime('%Y%m%d')}")
+    parser.add_argument("--parallel", type=int, default=BATCH_REPOS, help="repositories in flight at once")
+    args = parser.parse_args()
+
+    results = run_batch(read_repos(args.repos), args.out, args.parallel)
+    sys.exit(0 if all(r["status"] == "done" for r in results) else 1)
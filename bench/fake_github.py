@@ -0,0 +1,99 @@
+# bench/fake_github.py
+import io
+import re
+import json
+import base64
+import tarfile
+import threading
+from functools import lru_cache
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, unquote
+from bench.fixtures import make_repo, git_blob_sha
+
+HEAD_SHA = "b" * 40
+
+@lru_cache(maxsize=16)
+def _repo(name: str) -> dict[str, str]:
+    """`synthetic-<N>` → an N-module synthetic repo."""
+    match = re.fullmatch(r"synthetic-(\d+)", name)
+    return make_repo(int(match.group(1))) if match else {}
+
+class FakeGitHub(BaseHTTPRequestHandler):
+    """Just enough of the GitHub REST API for tools/github_tools.py."""
+    counts = {}
+    lock   = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("X-RateLimit-Remaining", "4999")
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _json(self, data):
+        body = json.dumps(data).encode()
+        etag = f'"{git_blob_sha(body.decode())}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", headers={"ETag": etag})
+        else:
+            self._send(200, body, headers={"ETag": etag})
+
+    def do_GET(self):
+        url   = urlparse(self.path)
+        parts = [unquote(p) for p in url.path.strip("/").split("/")]
+        kind  = parts[3] if len(parts) > 3 else "repo"
+        with FakeGitHub.lock:
+            FakeGitHub.counts[kind] = FakeGitHub.counts.get(kind, 0) + 1
+
+        if len(parts) < 3 or parts[0] != "repos":
+            return self._send(404, b"{}")
+        owner, name = parts[1], parts[2]
+        files = _repo(name)
+        if not files:
+            return self._send(404, b"{}")
+
+        if kind == "repo":
+            return self._json({
+                "name": name, "description": "Synthetic benchmark repo", "language": "Python",
+                "stargazers_count": 0, "forks_count": 0, "default_branch": "main",
+                "owner": {"login": owner}
+            })
+        if kind == "git":
+            return self._json({"tree": [
+                {"path": p, "type": "blob", "sha": git_blob_sha(c), "size": len(c.encode())}
+                for p, c in sorted(files.items())
+            ]})
+        if kind == "commits":
+            return self._send(200, HEAD_SHA.encode(), "text/plain")
+        if kind == "contents":
+            path = "/".join(parts[4:])
+            if path not in files:
+                return self._send(404, b"{}")
+            encoded = base64.b64encode(files[path].encode()).decode()
+            return self._json({"path": path, "content": encoded, "encoding": "base64"})
+        if kind == "tarball":
+            buffer = io.BytesIO()
+            with tarfile.open(fileobj=buffer, mode="w:gz") as archive:
+                for path, content in sorted(files.items()):
+                    data = content.encode()
+                    info = tarfile.TarInfo(f"{owner}-{name}-{HEAD_SHA[:7]}/{path}")
+                    info.size = len(data)
+                    archive.addfile(info, io.BytesIO(data))
+            return self._send(200, buffer.getvalue(), "application/x-gzip")
+        return self._send(404, b"{}")
+
+def reset_counts() -> dict:
+    with FakeGitHub.lock:
+        counts, FakeGitHub.counts = FakeGitHub.counts, {}
+    return counts
+
+def start(port: int = 0) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("127.0.0.1", port), FakeGitHub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,147 @@
+# bench/fake_llm.py
+import json
+import time
+import math
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+CANNED_REVIEW = """BUGS (Highest Priority)
+- Line: 7
+- Code: for i in range(len(items)):
+- Problem: Index-based loop over a list that may be a generator
+- Why it is a bug: generators have no len()
+- Suggested Fix: for item in items:
+
+SECURITY
+None found.
+
+PERFORMANCE
+None found.
+
+READABILITY / MAINTAINABILITY
+None found.
+
+POSITIVE OBSERVATIONS
+- Line: 2
+- What is done well: docstring present
+- Why it is good practice: documents intent
+"""
+
+CANNED_FIX = """### Fix for: index loop
+**Original:**
+```
+for i in range(len(items)):
+```
+**Fixed:**
+```
+for item in items:
+```
+**Why:** works for any iterable."""
+
+CANNED_SUMMARY = """VERDICT: Request Changes
+SCORE: 6/10
+SECURITY RISK: Low
+TOP 3 CRITICAL ISSUES:
+- index loops
+TOP 3 IMPROVEMENTS:
+- iterate directly
+ESTIMATED FIX TIME: 1 hours"""
+
+class Settings:
+    latency    = 0.2    # seconds before the first token
+    tps        = 200.0  # generated tokens per second
+    slots      = 4      # requests served in parallel, the rest queue
+    embed_dim  = 64
+    counts     = {}
+    lock       = threading.Lock()
+
+def configure(latency: float, tps: float, slots: int):
+    Settings.latency, Settings.tps, Settings.slots = latency, tps, slots
+
+def _vector(text: str) -> list[float]:
+    digest = hashlib.sha256(text.encode()).digest()
+    raw    = [digest[i % len(digest)] - 128 + i for i in range(Settings.embed_dim)]
+    norm   = math.sqrt(sum(x * x for x in raw)) or 1.0
+    return [x / norm for x in raw]
+
+def _answer(messages: list[dict]) -> str:
+    system = messages[0]["content"] if messages else ""
+    if "fix suggestions" in system:
+        return CANNED_FIX
+    if "final code review summary" in system:
+        return CANNED_SUMMARY
+    if "condense" in system:
+        return "- module_x.py: index-based loops over possibly non-list input"
+    return CANNED_REVIEW
+
+class FakeLLM(BaseHTTPRequestHandler):
+    """OpenAI-compatible /v1/chat/completions, /v1/embeddings and /v1/models."""
+    semaphore = None  # per server, see start()
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, data, status: int = 200):
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _count(self, kind: str):
+        with Settings.lock:
+            Settings.counts[kind] = Settings.counts.get(kind, 0) + 1
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            return self._json({"object": "list", "data": [{"id": "fake-model", "object": "model"}]})
+        self._json({}, 404)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body   = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.endswith("/embeddings"):
+            self._count("embeddings")
+            texts = body["input"] if isinstance(body["input"], list) else [body["input"]]
+            texts = [t if isinstance(t, str) else json.dumps(t) for t in texts]
+            with self.semaphore:
+                time.sleep(Settings.latency / 4)
+            return self._json({
+                "object": "list", "model": body.get("model", "fake-embed"),
+                "data":   [{"object": "embedding", "index": i, "embedding": _vector(t)}
+                           for i, t in enumerate(texts)],
+                "usage":  {"prompt_tokens": 0, "total_tokens": 0}
+            })
+
+        if self.path.endswith("/chat/completions"):
+            self._count("chat")
+            messages   = body.get("messages", [])
+            answer     = _answer(messages)
+            prompt     = sum(len(str(m.get("content", ""))) for m in messages) // 4
+            completion = len(answer) // 4
+            with self.semaphore:
+                time.sleep(Settings.latency + completion / Settings.tps)
+            return self._json({
+                "id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                "model": body.get("model", "fake-model"),
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": answer}}],
+                "usage": {"prompt_tokens": prompt, "completion_tokens": completion,
+                          "total_tokens": prompt + completion}
+            })
+        self._json({}, 404)
+
+def reset_counts() -> dict:
+    with Settings.lock:
+        counts, Settings.counts = Settings.counts, {}
+    return counts
+
+def start(port: int = 0) -> ThreadingHTTPServer:
+    # Each fake server has its own slots, like a separate inference box
+    handler = type("FakeLLMServer", (FakeLLM,), {"semaphore": threading.Semaphore(Settings.slots)})
+    server  = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,63 @@
+# bench/fixtures.py
+import hashlib
+import random
+
+FUNCTION_TEMPLATE = '''
+def {name}(items, limit={limit}):
+    """Process {name} records."""
+    result = []
+    for i in range(len(items)):
+        if items[i] is None:
+            continue
+        value = items[i] * {factor}
+        if value > limit:
+            result.append(value)
+    return result
+'''
+
+CLASS_TEMPLATE = '''
+class {name}:
+    def __init__(self, config=None):
+        self.config = config or {{}}
+        self.cache = []
+
+    def load(self, path):
+        with open(path) as f:
+            data = f.read()
+        self.cache.append(data)
+        return data
+
+    def run(self, items):
+        return {helper}(items)
+'''
+
+def git_blob_sha(content: str) -> str:
+    data = content.encode("utf-8")
+    return hashlib.sha1(b"blob %d\0" % len(data) + data).hexdigest()
+
+def make_file(index: int, functions: int, rng: random.Random) -> str:
+    parts = [f'"""Synthetic module {index}."""\nimport os\nimport json\n']
+    for j in range(functions):
+        parts.append(FUNCTION_TEMPLATE.format(name=f"process_{index}_{j}",
+                                              limit=rng.randint(1, 100),
+                                              factor=rng.randint(2, 9)))
+    parts.append(CLASS_TEMPLATE.format(name=f"Worker{index}", helper=f"process_{index}_0"))
+    return "".join(parts)
+
+def make_repo(n_files: int, functions_per_file: int = 6, seed: int = 0) -> dict[str, str]:
+    """
+    Deterministic synthetic repo: path -> content.
+    Mostly distinct modules, plus the things real repos have: empty
+    __init__.py files, a constants module and a vendored copy of a module.
+    """
+    rng   = random.Random(seed)
+    files = {}
+    for i in range(n_files):
+        package = f"pkg{i // 20}"
+        if i % 20 == 0:
+            files[f"{package}/__init__.py"] = ""
+        files[f"{package}/module_{i}.py"] = make_file(i, functions_per_file, rng)
+    files["settings.py"] = "\n".join(f"SETTING_{i} = {i}" for i in range(20)) + "\n"
+    if n_files > 1:
+        files["vendor/module_copy.py"] = files["pkg0/module_1.py"]
+    return files
@@ -0,0 +1,133 @@
+# bench/run_bench.py
+"""
+Offline benchmark: runs the full review pipeline against a fake GitHub API
+and a fake OpenAI-compatible LLM server, one subprocess per scenario so each
+run starts cold (own cache dir, own Chroma, own peak RSS).
+
+    python -m bench.run_bench --sizes 10 50 --concurrency 1 4 --servers 1 2 --warm
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import resource
+import subprocess
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def worker(repo_url: str):
+    """Child process: one review run, print a JSON result line."""
+    from graph.review_graph import run_review
+    start       = time.perf_counter()
+    report_path = run_review(repo_url, report_path=os.path.join(os.getcwd(), "report.md"))
+    wall        = time.perf_counter() - start
+
+    with open(os.path.splitext(report_path)[0] + ".trace.json", encoding="utf-8") as f:
+        trace = json.load(f)
+    stages = defaultdict(float)
+    for entry in trace["stages"]:
+        stages[entry["stage"]] += entry["seconds"]
+    llm = trace["llm"]
+    print(json.dumps({
+        "wall_seconds":      round(wall, 2),
+        "peak_rss_mb":       round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "stages":            {k: round(v, 2) for k, v in stages.items()},
+        "llm_calls":         len(llm),
+        "llm_cached":        sum(1 for c in llm if c["cached"]),
+        "completion_tokens": sum(c["completion_tokens"] for c in llm),
+        "github_requests":   trace["github"]["requests"],
+        "embedded_texts":    trace["embeddings"]["texts"],
+        "per_endpoint":      [e["requests"] for e in trace.get("endpoints", {}).values() if e["kind"] == "llm"]
+    }))
+
+def run_scenario(size: int, concurrency: int, github_url: str, llm_urls: list[str], cache_dir: str) -> dict:
+    env = {
+        **os.environ,
+        "GITHUB_API_URL":   github_url,
+        "LM_STUDIO_URL":    llm_urls[0],
+        "LLM_ENDPOINTS":    ",".join(llm_urls),
+        "EMBED_ENDPOINTS":  ",".join(llm_urls),
+        "REVIEW_CACHE_DIR": cache_dir,
+        "LLM_CONCURRENCY":  str(concurrency),
+        "FETCH_WORKERS":    str(max(concurrency, 1) * 2),
+        "GITHUB_TOKEN":     "bench",
+        "OPENAI_API_KEY":   "bench",
+        "PYTHONPATH":       ROOT
+    }
+    proc = subprocess.run(
+        [sys.executable, "-m", "bench.run_bench", "--worker", f"https://github.com/bench/synthetic-{size}"],
+        env=env, cwd=cache_dir, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"scenario size={size} concurrency={concurrency} failed:\n{proc.stderr[-2000:]}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+def print_table(rows: list[dict]):
+    columns = ["size", "conc", "servers", "run", "wall_seconds", "peak_rss_mb", "llm_calls", "llm_cached",
+               "completion_tokens", "github_requests", "embedded_texts", "gh_server", "llm_server"]
+    print(" | ".join(columns))
+    print(" | ".join("---" for _ in columns))
+    for row in rows:
+        print(" | ".join(str(row.get(c, "")) for c in columns))
+    print()
+    for row in rows:
+        stages = ", ".join(f"{k}={v}s" for k, v in sorted(row["stages"].items()))
+        print(f"size={row['size']} conc={row['conc']} servers={row['servers']} {row['run']}: {stages}; "
+              f"LLM requests per endpoint {row['per_endpoint']}")
+
+def main():
+    from bench import fake_github, fake_llm
+
+    parser = argparse.ArgumentParser(description="Offline code-review pipeline benchmark")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--servers", type=int, nargs="+", default=[1],
+                        help="fake LLM servers behind the endpoint pool")
+    parser.add_argument("--latency", type=float, default=0.2, help="fake LLM time-to-first-token (s)")
+    parser.add_argument("--tps", type=float, default=200.0, help="fake LLM tokens per second")
+    parser.add_argument("--slots", type=int, default=4, help="fake LLM parallel request slots")
+    parser.add_argument("--warm", action="store_true", help="re-run each scenario on its warm caches")
+    parser.add_argument("--json", help="also write the raw results here")
+    args = parser.parse_args()
+
+    if args.worker:
+        return worker(args.worker)
+
+    fake_llm.configure(args.latency, args.tps, args.slots)
+    github     = fake_github.start()
+    llms       = [fake_llm.start() for _ in range(max(args.servers))]
+    github_url = f"http://127.0.0.1:{github.server_port}"
+    llm_urls   = [f"http://127.0.0.1:{llm.server_port}/v1" for llm in llms]
+
+    rows = []
+    for size in args.sizes:
+        for concurrency in args.concurrency:
+            for servers in args.servers:
+                with tempfile.TemporaryDirectory(prefix="review-bench-") as cache_dir:
+                    for run in (["cold", "warm"] if args.warm else ["cold"]):
+                        fake_github.reset_counts()
+                        fake_llm.reset_counts()
+                        result = run_scenario(size, concurrency, github_url, llm_urls[:servers], cache_dir)
+                        result.update(
+                            size=size, conc=concurrency, servers=servers, run=run,
+                            gh_server=sum(fake_github.reset_counts().values()),
+                            llm_server=sum(fake_llm.reset_counts().values())
+                        )
+                        rows.append(result)
+                        print(f"size={size} conc={concurrency} servers={servers} {run}: "
+                              f"{result['wall_seconds']}s", file=sys.stderr)
+
+    github.shutdown()
+    for llm in llms:
+        llm.shutdown()
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# checkpoints.py
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from dataclasses import asdict
+from langgraph.checkpoint.sqlite import SqliteSaver
+from tools.github_tools import parse_repo_url, parse_pr_number, get_repo_info, get_head_sha, get_pull_request
+from report.findings import Finding
+from config import CACHE_DIR, CHECKPOINT_TTL_HOURS
+
+CHECKPOINT_DB_PATH = os.path.join(CACHE_DIR, "checkpoints.sqlite")
+
+def review_key(pr_url: str) -> str:
+    """owner/repo[#pr]@sha — two requests with the same key produce the same review."""
+    owner, repo = parse_repo_url(pr_url)
+    pr_number   = parse_pr_number(pr_url)
+    if pr_number:
+        sha = get_pull_request(owner, repo, pr_number)["head_sha"]
+        return f"{owner}/{repo}#{pr_number}@{sha}".lower()
+    branch = get_repo_info(owner, repo)["default_branch"]
+    return f"{owner}/{repo}@{get_head_sha(owner, repo, branch)}".lower()
+
+class ResultStore:
+    """
+    Durable progress of review runs, keyed by review_key (repo + commit SHA).
+    `runs` maps a key to the LangGraph thread of its unfinished run;
+    `file_results` keeps every finished file (review, suggestion, findings)
+    so a rerun of the same commit never reviews that file again; `texts`
+    holds per-run results the graph state refers to by key (never evicted,
+    only expired with the checkpoints).
+    """
+
+    def __init__(self, path: str = CHECKPOINT_DB_PATH, ttl_hours: float = CHECKPOINT_TTL_HOURS):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db   = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS runs (
+            thread_id TEXT PRIMARY KEY, run_key TEXT, report_path TEXT, status TEXT,
+            started REAL, finished REAL)""")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS file_results (
+            run_key TEXT, filename TEXT, sha TEXT, review TEXT, suggestion TEXT,
+            findings TEXT, finished REAL, PRIMARY KEY (run_key, filename))""")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS texts (
+            key TEXT PRIMARY KEY, text TEXT, created REAL)""")
+        cutoff = time.time() - ttl_hours * 3600
+        self._db.execute("DELETE FROM file_results WHERE finished < ?", (cutoff,))
+        self._db.execute("DELETE FROM texts WHERE created < ?", (cutoff,))
+        self._db.execute("DELETE FROM runs WHERE started < ?", (cutoff,))
+        self._db.commit()
+
+    def unfinished_run(self, run_key: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT thread_id, report_path FROM runs WHERE run_key = ? AND status = 'running' "
+                "ORDER BY started DESC LIMIT 1", (run_key,)).fetchone()
+        return {"thread_id": row[0], "report_path": row[1]} if row else None
+
+    def start_run(self, run_key: str, report_path: str) -> str:
+        thread_id = f"{run_key}/{uuid.uuid4().hex[:8]}"
+        with self._lock:
+            self._db.execute("UPDATE runs SET status = 'abandoned' WHERE run_key = ? AND status = 'running'",
+                             (run_key,))
+            self._db.execute("INSERT INTO runs VALUES (?, ?, ?, 'running', ?, NULL)",
+                             (thread_id, run_key, report_path, time.time()))
+            self._db.commit()
+        return thread_id
+
+    def finish_run(self, thread_id: str):
+        with self._lock:
+            self._db.execute("UPDATE runs SET status = 'done', finished = ? WHERE thread_id = ?",
+                             (time.time(), thread_id))
+            self._db.commit()
+
+    def get_file(self, run_key: str, f: dict) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT review, suggestion, findings FROM file_results "
+                "WHERE run_key = ? AND filename = ? AND sha = ?",
+                (run_key, f["filename"], str(f.get("sha", "")))).fetchone()
+        if row is None:
+            return None
+        return {"review": row[0], "suggestion": row[1],
+                "findings": [Finding(**d) for d in json.loads(row[2])]}
+
+    def put_file(self, run_key: str, f: dict, review: str, suggestion: str | None, findings: list[Finding]):
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO file_results VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (run_key, f["filename"], str(f.get("sha", "")), review, suggestion,
+                 json.dumps([asdict(x) for x in findings]), time.time()))
+            self._db.commit()
+
+    def put_text(self, key: str, text: str):
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO texts VALUES (?, ?, ?)", (key, text, time.time()))
+            self._db.commit()
+
+    def get_text(self, key: str) -> str | None:
+        with self._lock:
+            row = self._db.execute("SELECT text FROM texts WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+_store        = None
+_checkpointer = None
+
+def get_result_store() -> ResultStore:
+    global _store
+    if _store is None:
+        _store = ResultStore()
+    return _store
+
+def get_checkpointer() -> SqliteSaver:
+    """LangGraph checkpointer next to the result store: graph state after every step."""
+    global _checkpointer
+    if _checkpointer is None:
+        os.makedirs(os.path.dirname(CHECKPOINT_DB_PATH) or ".", exist_ok=True)
+        _checkpointer = SqliteSaver(sqlite3.connect(CHECKPOINT_DB_PATH, check_same_thread=False))
+    return _checkpointer
@@ -5,8 +5,73 @@ from dotenv import load_dotenv
 load_dotenv()
 
 GITHUB_TOKEN  = os.getenv("GITHUB_TOKEN", "")
-LM_STUDIO_URL = "http://127.0.0.1:1234/v1"
+LM_STUDIO_URL  = os.getenv("LM_STUDIO_URL", "http://127.0.0.1:1234/v1")
+GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com")
 LM_MODEL      = "ministral-3-3b-instruct-2512"
 
-MAX_FILE_SIZE = 4000 #change as per model
+# Inference servers: comma-separated OpenAI-compatible base URLs, load-balanced
+LLM_ENDPOINTS   = [u.strip().rstrip("/") for u in os.getenv("LLM_ENDPOINTS", LM_STUDIO_URL).split(",") if u.strip()]
+EMBED_ENDPOINTS = [u.strip().rstrip("/") for u in os.getenv("EMBED_ENDPOINTS", ",".join(LLM_ENDPOINTS)).split(",")
+                   if u.strip()]
+ENDPOINT_ATTEMPTS        = 3   # tries per request, each on a different endpoint when possible
+ENDPOINT_EJECT_SECONDS   = 30  # a failing endpoint gets no traffic for this long
+ENDPOINT_HEALTH_INTERVAL = 10  # seconds between /models health checks
+
 MAX_FILES     = 10 
+
+# Context window accounting (change as per model)
+MODEL_CONTEXT_TOKENS = 4096
+COMPLETION_TOKENS    = 2048  # max_tokens reserved for each answer
+WINDOW_OVERLAP_LINES = 20    # large files are reviewed in overlapping windows
+DIGEST_TOKENS        = 400   # size of each intermediate summary digest
+
+# GitHub fetching
+FETCH_WORKERS       = int(os.getenv("FETCH_WORKERS", 8))  # parallel downloads (one pooled connection each)
+FETCH_RETRIES       = 3    # retries on 5xx / rate limiting / connection errors
+RATE_LIMIT_MAX_WAIT = 120  # max seconds to sleep waiting for a rate-limit reset
+ARCHIVE_THRESHOLD   = 50   # above this many files, download one tarball instead
+
+# Local caches
+CACHE_DIR         = os.getenv("REVIEW_CACHE_DIR", ".cache")
+BLOB_CACHE_MAX_MB = 500  # file contents keyed by git blob SHA, LRU-evicted
+
+# Embeddings
+EMBED_MODEL      = "text-embedding-nomic-embed-text-v1.5"
+EMBED_BATCH_SIZE = 32  # texts per embedding request
+EMBED_WORKERS    = 4 * len(EMBED_ENDPOINTS)  # parallel embedding requests (4 per server)
+RRF_K            = 60  # reciprocal rank fusion constant for hybrid BM25 + vector retrieval
+
+# LLM execution
+LLM_CONCURRENCY     = int(os.getenv("LLM_CONCURRENCY", 4)) * len(LLM_ENDPOINTS)  # per server × servers
+LLM_REQUEST_TIMEOUT = 300  # seconds per LLM call
+
+# LLM response cache (set LLM_CACHE_BYPASS=1 to always call the model)
+LLM_CACHE_BYPASS    = os.getenv("LLM_CACHE_BYPASS", "") == "1"
+LLM_CACHE_TTL_HOURS = 24 * 7
+LLM_CACHE_MAX_MB    = 200
+
+# Static triage before the LLM (set REVIEW_TRIAGE=0 to review every file alone)
+TRIAGE_ENABLED       = os.getenv("REVIEW_TRIAGE", "1") != "0"
+TRIAGE_TRIVIAL_LINES = 40   # import/constant-only modules shorter than this are skipped
+BUNDLE_FILE_TOKENS   = 400  # files smaller than this share one review prompt
+
+# Duplicate files: one review per group of copies
+DEDUP_ENABLED      = os.getenv("REVIEW_DEDUP", "1") != "0"
+NEAR_DUP_THRESHOLD = 0.9  # estimated Jaccard similarity of token shingles; 1.0 = exact copies only
+
+# Resumable runs: finished files and graph checkpoints per repo + commit (+ prompt version)
+RESUME_ENABLED       = os.getenv("REVIEW_RESUME", "1") != "0"  # 0 = always start over
+CHECKPOINT_TTL_HOURS = 24 * 7
+
+# Pull-request mode
+PR_CONTEXT_LINES = 10  # unchanged lines shown around each changed line
+
+# Fix suggestions
+SUGGEST_MARGIN_LINES = 3  # lines shown around each line a finding cites
+
+# Batch sweeps (batch.py)
+BATCH_REPOS = 4  # repositories in flight at once; LLM work is bounded by the scheduler
+
+# API job queue
+JOB_WORKERS   = 2   # reviews running at the same time
+JOB_QUEUE_MAX = 20  # queued + running jobs before POST /review returns 429
@@ -0,0 +1,223 @@
+# endpoints.py
+import time
+import asyncio
+import threading
+import requests
+from typing import Any
+from openai import APIConnectionError, InternalServerError, RateLimitError
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_openai import ChatOpenAI, OpenAIEmbeddings
+from metrics import inc, observe, set_gauge, update
+from scheduler import LLM_REQUESTS
+from config import (LLM_ENDPOINTS, EMBED_ENDPOINTS, EMBED_MODEL, LLM_REQUEST_TIMEOUT,
+                    ENDPOINT_ATTEMPTS, ENDPOINT_EJECT_SECONDS, ENDPOINT_HEALTH_INTERVAL)
+
+# Worth trying elsewhere: the server is down, overloaded or timed out. A 400 (e.g.
+# prompt too long) would fail the same way on every endpoint.
+RETRYABLE = (APIConnectionError, InternalServerError, RateLimitError, requests.ConnectionError,
+             requests.Timeout)
+
+class Endpoint:
+    def __init__(self, url: str):
+        self.url           = url
+        self.outstanding   = 0
+        self.ejected_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+class EndpointPool:
+    """
+    OpenAI-compatible servers behind one client: least-outstanding-requests
+    dispatch, ejection of endpoints that fail or time out (retried on
+    another one), and a background /models health check that brings them back.
+    """
+
+    def __init__(self, urls: list[str], kind: str,
+                 eject_seconds: float = ENDPOINT_EJECT_SECONDS,
+                 health_interval: float = ENDPOINT_HEALTH_INTERVAL):
+        self.kind          = kind
+        self.endpoints     = [Endpoint(u) for u in urls]
+        self.eject_seconds = eject_seconds
+        self._lock         = threading.Lock()
+        for ep in self.endpoints:
+            set_gauge("review_endpoint_healthy", 1, "1 if the endpoint takes requests", kind=kind, endpoint=ep.url)
+        if len(self.endpoints) > 1 and health_interval:
+            threading.Thread(target=self._health_loop, args=(health_interval,), daemon=True).start()
+
+    # ── dispatch ──
+    def acquire(self, tried: set[str] = frozenset()) -> Endpoint:
+        """Healthy, untried endpoint with the fewest requests in flight (anything, as a last resort)."""
+        with self._lock:
+            candidates = ([ep for ep in self.endpoints if ep.healthy and ep.url not in tried]
+                          or [ep for ep in self.endpoints if ep.healthy]
+                          or sorted(self.endpoints, key=lambda ep: ep.ejected_until)[:1])
+            ep = min(candidates, key=lambda ep: ep.outstanding)
+            ep.outstanding += 1
+            set_gauge("review_endpoint_outstanding", ep.outstanding, "Requests in flight per endpoint",
+                      kind=self.kind, endpoint=ep.url)
+            return ep
+
+    def release(self, ep: Endpoint, seconds: float, outcome: str):
+        with self._lock:
+            ep.outstanding -= 1
+            set_gauge("review_endpoint_outstanding", ep.outstanding, "Requests in flight per endpoint",
+                      kind=self.kind, endpoint=ep.url)
+        inc("review_endpoint_requests_total", 1, "Requests per endpoint",
+            kind=self.kind, endpoint=ep.url, outcome=outcome)
+        if outcome == "ok":
+            observe("review_endpoint_seconds", seconds, "Request latency per endpoint",
+                    kind=self.kind, endpoint=ep.url)
+        elif outcome == "error":
+            self.eject(ep)
+
+        def add(section):
+            entry = section.setdefault(ep.url, {"kind": self.kind, "requests": 0, "errors": 0, "seconds": 0.0})
+            entry["requests"] += 1
+            entry["errors"]   += outcome == "error"
+            entry["seconds"]   = round(entry["seconds"] + seconds, 3)
+        update("endpoints", add)
+
+    def eject(self, ep: Endpoint):
+        ep.ejected_until = time.monotonic() + self.eject_seconds
+        set_gauge("review_endpoint_healthy", 0, "1 if the endpoint takes requests", kind=self.kind, endpoint=ep.url)
+        if len(self.endpoints) > 1:
+            print(f"[POOL] {self.kind} endpoint {ep.url} ejected for {self.eject_seconds:.0f}s")
+
+    def call(self, fn):
+        """fn(endpoint) on the best endpoint; retryable failures move on to another one."""
+        tried = set()
+        for attempt in range(ENDPOINT_ATTEMPTS):
+            ep    = self.acquire(tried)
+            start = time.perf_counter()
+            try:
+                result = fn(ep)
+            except RETRYABLE:
+                self.release(ep, time.perf_counter() - start, "error")
+                tried.add(ep.url)
+                if attempt == ENDPOINT_ATTEMPTS - 1:
+                    raise
+                continue
+            except BaseException:
+                self.release(ep, time.perf_counter() - start, "failed")
+                raise
+            self.release(ep, time.perf_counter() - start, "ok")
+            return result
+
+    async def acall(self, fn):
+        """Async call(): `fn(endpoint)` returns an awaitable. Cancellation frees the slot without ejecting."""
+        tried = set()
+        for attempt in range(ENDPOINT_ATTEMPTS):
+            ep    = self.acquire(tried)
+            start = time.perf_counter()
+            try:
+                result = await fn(ep)
+            except RETRYABLE:
+                self.release(ep, time.perf_counter() - start, "error")
+                tried.add(ep.url)
+                if attempt == ENDPOINT_ATTEMPTS - 1:
+                    raise
+                continue
+            except asyncio.CancelledError:
+                self.release(ep, time.perf_counter() - start, "cancelled")
+                raise
+            except BaseException:
+                self.release(ep, time.perf_counter() - start, "failed")
+                raise
+            self.release(ep, time.perf_counter() - start, "ok")
+            return result
+
+    # ── health ──
+    def check_health(self):
+        for ep in self.endpoints:
+            try:
+                ok = requests.get(f"{ep.url}/models", timeout=5).status_code == 200
+            except requests.RequestException:
+                ok = False
+            if not ok:
+                self.eject(ep)
+            elif not ep.healthy:
+                ep.ejected_until = 0.0
+                print(f"[POOL] {self.kind} endpoint {ep.url} is back")
+            if ok:
+                set_gauge("review_endpoint_healthy", 1, "1 if the endpoint takes requests",
+                          kind=self.kind, endpoint=ep.url)
+
+    def _health_loop(self, interval: float):
+        while True:
+            time.sleep(interval)
+            self.check_health()
+
+class PooledChatModel(BaseChatModel):
+    """
+    ChatOpenAI over an EndpointPool. The endpoint is not part of the model's
+    identity, so LLM cache entries are shared by every server. Requests that
+    miss the cache hold a process-wide permit (scheduler.LLM_REQUESTS).
+    """
+    model:       str
+    temperature: float
+    max_tokens:  int
+    timeout:     float = LLM_REQUEST_TIMEOUT
+    pool:        Any = None
+    clients:     dict = {}
+
+    def __init__(self, pool: EndpointPool, **kwargs):
+        super().__init__(pool=pool, **kwargs)
+        # No client-side retries: a failing server is the pool's cue to go elsewhere
+        self.clients = {
+            ep.url: ChatOpenAI(base_url=ep.url, api_key="lm-studio", model=self.model,
+                               temperature=self.temperature, max_tokens=self.max_tokens,
+                               timeout=self.timeout, max_retries=0)
+            for ep in pool.endpoints
+        }
+
+    @property
+    def _llm_type(self) -> str:
+        return "pooled-openai-chat"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model": self.model, "temperature": self.temperature, "max_tokens": self.max_tokens}
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with LLM_REQUESTS.hold():
+            return self.pool.call(lambda ep: self.clients[ep.url]._generate(
+                messages, stop=stop, run_manager=run_manager, **kwargs))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        async with LLM_REQUESTS.ahold():
+            return await self.pool.acall(lambda ep: self.clients[ep.url]._agenerate(
+                messages, stop=stop, run_manager=run_manager, **kwargs))
+
+    def _combine_llm_outputs(self, llm_outputs: list) -> dict:
+        return next(iter(self.clients.values()))._combine_llm_outputs(llm_outputs)
+
+class PooledEmbeddings(Embeddings):
+    """OpenAIEmbeddings over an EndpointPool (every endpoint must serve the same model)."""
+
+    def __init__(self, pool: EndpointPool, model: str = EMBED_MODEL):
+        self.pool    = pool
+        self.clients = {
+            ep.url: OpenAIEmbeddings(base_url=ep.url, api_key="lm-studio", model=model,
+                                     check_embedding_ctx_length=False,  # disables token checking
+                                     max_retries=0)
+            for ep in pool.endpoints
+        }
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.pool.call(lambda ep: self.clients[ep.url].embed_documents(texts))
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.pool.call(lambda ep: self.clients[ep.url].embed_query(text))
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+def get_pool(kind: str) -> EndpointPool:
+    """Process-wide pool for "llm" or "embed" endpoints."""
+    with _pools_lock:
+        if kind not in _pools:
+            _pools[kind] = EndpointPool(LLM_ENDPOINTS if kind == "llm" else EMBED_ENDPOINTS, kind)
+        return _pools[kind]
@@ -0,0 +1,10 @@
+# graph/events.py
+from langgraph.config import get_stream_writer
+
+def emit(event: str, **data):
+    """Progress event for stream_review(); a no-op outside a streamed graph run."""
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer({"event": event, **data})
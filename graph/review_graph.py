@@ -1,41 +1,240 @@
 # graph/review_graph.py
 from langgraph.graph import StateGraph, END
-from typing import TypedDict, Optional, Any
+from langgraph.types import Send
+from typing import TypedDict, Optional, Annotated
+from datetime import datetime
+import operator
 from agents.fetcher    import fetcher_agent
-from agents.reviewer   import reviewer_agent
-from agents.suggester  import suggester_agent
+from agents.triage     import triage_agent
+from agents.reviewer   import review_file, review_bundle, REVIEW_PROMPT, BUNDLE_PROMPT
+from agents.suggester  import suggest_file, SUGGEST_PROMPT
 from agents.summariser import summariser_agent
+from rag.code_store    import index_file
+from rag.embeddings    import merge_stats
+from report.findings   import parse_findings, project_findings
+from report.writer     import ReportWriter, render_section, render_duplicate
+from graph.events      import emit
+from tools.file_store  import with_content, load_content, put_text, get_json
+from llm import get_llm_cache, is_failed
+from checkpoints import review_key, get_result_store, get_checkpointer
+from metrics import timed, start_trace, end_trace
+from scheduler import SCHEDULER
+import os
+import uuid
+import hashlib
+from config import LLM_CONCURRENCY, LM_MODEL, RESUME_ENABLED
+
+# Stored file results are only reused with the prompts and model that produced them
+PROMPT_VERSION = hashlib.sha1("\0".join(
+    [LM_MODEL] + [p.pretty_repr() for p in (REVIEW_PROMPT, BUNDLE_PROMPT, SUGGEST_PROMPT)]
+).encode("utf-8")).hexdigest()[:8]
+
+def merge_dicts(a: dict | None, b: dict | None) -> dict:
+    return {**(a or {}), **(b or {})}
 
 class ReviewState(TypedDict):
     pr_url:       str
+    run_key:      str  # owner/repo[#pr]@sha+prompt version — keys checkpoints and stored file results
     pr_info:      Optional[dict]
     files:        Optional[list]
-    reviews:      Optional[dict]
-    suggestions:  Optional[dict]
-    final_report: Optional[str]
+    reviews:      Annotated[dict, merge_dicts]  # filename -> key of the review text in the file store
+    findings:     Annotated[list, operator.add]
+    report_path:  Optional[str]
     owner:        Optional[str]
     repo:         Optional[str]
     pr_number:    Optional[int]
     repo_info:    Optional[dict]
-    vectorstore:  Optional[Any]
+    embed_stats:  Annotated[dict, merge_stats]
+    symbols:      Optional[str]  # file-store key of the symbol index (JSON)
+    cache_start:  Optional[dict]
+    batches:      Optional[list]  # file indices per review prompt, riskiest first
+    skipped:      Optional[list]
+    duplicates:   Optional[dict]  # representative filename -> files reviewed through it
+
+class FileTask(TypedDict):
+    indices:     list[int]
+    files:       list[dict]
+    duplicates:  dict  # filename -> [{"file", "index", "similarity"}] of its copies
+    run_key:     str
+    owner:       str
+    repo:        str
+    repo_title:  str
+    symbols:     str
+    report_path: str
+
+def _copies(state: ReviewState, filename: str) -> list[dict]:
+    return [{"file": state["files"][m["index"]], "index": m["index"], "similarity": m["similarity"]}
+            for m in (state.get("duplicates") or {}).get(filename, [])]
+
+def fan_out_files(state: ReviewState) -> list[Send]:
+    """One independent index → review → suggest task per triage batch, riskiest first."""
+    return [
+        Send("file_worker", {
+            "indices":     batch,
+            "files":       [state["files"][i] for i in batch],
+            "duplicates":  {state["files"][i]["filename"]: _copies(state, state["files"][i]["filename"])
+                            for i in batch},
+            "run_key":     state["run_key"],
+            "owner":       state["owner"],
+            "repo":        state["repo"],
+            "repo_title":  state["pr_info"]["title"],
+            "symbols":     state["symbols"],
+            "report_path": state["report_path"]
+        })
+        for batch in state["batches"]
+    ] or [Send("summariser", state)]
+
+def file_worker(task: FileTask) -> dict:
+    # One slot of the process-wide scheduler, shared fairly with other running reviews
+    with SCHEDULER.slot():
+        return review_batch(task)
+
+def summarise(state: ReviewState) -> dict:
+    with SCHEDULER.slot():
+        return summariser_agent(state)
+
+def review_batch(task: FileTask) -> dict:
+    # Bodies are loaded here and dropped when the task ends: memory follows concurrency, not repo size
+    files       = [with_content(f) for f in task["files"]]
+    symbols     = get_json(task["symbols"])
+    store       = get_result_store()
+    embed_stats = {}
+    # Copies are not reviewed but must be searchable like any file (their embeddings are cache hits)
+    copies = [dup["file"] for f in files for dup in task["duplicates"].get(f["filename"], [])]
+    for f in files + copies:
+        with timed("index", f["filename"]):
+            vectorstore, stats = index_file(with_content(f), task["owner"], task["repo"])
+        embed_stats = merge_stats(embed_stats, stats)
+        emit("embedded", file=f["filename"], embedded=stats.get("misses", 0))
+
+    # Files finished by an earlier (interrupted) run of this commit are not reviewed again
+    stored = {} if not RESUME_ENABLED else {
+        f["filename"]: r for f in files if (r := store.get_file(task["run_key"], f))}
+    todo   = [f for f in files if f["filename"] not in stored]
+
+    reviews = {}
+    if len(todo) == 1:
+        with timed("review", todo[0]["filename"]):
+            reviews = {todo[0]["filename"]: review_file(todo[0], vectorstore, symbols,
+                                                        task["repo_title"])}
+    elif todo:
+        with timed("review", ", ".join(f["filename"] for f in todo)):
+            reviews = review_bundle(todo, vectorstore, symbols, task["repo_title"])
+
+    all_findings = []
+    for index, f in zip(task["indices"], files):
+        if f["filename"] in stored:
+            done = stored[f["filename"]]
+            review, suggestion, findings = done["review"], done["suggestion"], done["findings"]
+            reviews[f["filename"]] = review
+            emit("reviewed", file=f["filename"], findings=len(findings), resumed=True)
+        else:
+            review   = reviews[f["filename"]]
+            findings = parse_findings(f["filename"], review)
+            emit("reviewed", file=f["filename"], findings=len(findings))
+
+            with timed("suggest", f["filename"]):
+                suggestion = suggest_file(f, review, findings)
+            # Failed calls are left out so a rerun tries them again
+            if not is_failed(review) and not (suggestion and is_failed(suggestion)):
+                store.put_file(task["run_key"], f, review, suggestion, findings)
+        all_findings += findings
+
+        # Write this file's report section now instead of holding it until the end
+        ReportWriter(task["report_path"]).write_section(index, f["filename"], review, suggestion)
+        emit("suggested", file=f["filename"], index=index,
+             section=render_section(f["filename"], review, suggestion))
+
+        # Copies get this file's findings instead of a review of their own
+        for dup in task["duplicates"].get(f["filename"], []):
+            copy      = dup["file"]
+            projected = project_findings(findings, copy["filename"],
+                                         None if dup["similarity"] >= 1.0 else load_content(copy))
+            all_findings += projected
+            note = render_duplicate(f["filename"], dup["similarity"], projected)
+            ReportWriter(task["report_path"]).write_section(dup["index"], copy["filename"], note)
+            emit("suggested", file=copy["filename"], index=dup["index"], duplicate_of=f["filename"],
+                 section=render_section(copy["filename"], note))
+    return {
+        "reviews":     {name: put_text(review) for name, review in reviews.items()},
+        "findings":    all_findings,
+        "embed_stats": embed_stats
+    }
 
 def build_review_graph():
     graph = StateGraph(ReviewState)
-    graph.add_node("fetcher",    fetcher_agent)
-    graph.add_node("reviewer",   reviewer_agent)
-    graph.add_node("suggester",  suggester_agent)
-    graph.add_node("summariser", summariser_agent)
+    graph.add_node("fetcher",     fetcher_agent)
+    graph.add_node("triage",      triage_agent)
+    graph.add_node("file_worker", file_worker)
+    graph.add_node("summariser",  summarise)
     graph.set_entry_point("fetcher")
-    graph.add_edge("fetcher",    "reviewer")
-    graph.add_edge("reviewer",   "suggester")
-    graph.add_edge("suggester",  "summariser")
-    graph.add_edge("summariser", END)
-    return graph.compile()
+    graph.add_edge("fetcher", "triage")
+    graph.add_conditional_edges("triage", fan_out_files, ["file_worker", "summariser"])
+    graph.add_edge("file_worker", "summariser")
+    graph.add_edge("summariser",  END)
+    return graph.compile(checkpointer=get_checkpointer())
 
 review_graph = build_review_graph()
 
-def run_review(repo_url: str) -> str:
+def default_report_path() -> str:
+    # Suffix: runs started in the same second must not share a report / spool directory
+    return f"review_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:6]}.md"
+
+def stream_review(repo_url: str, report_path: str | None = None):
+    """
+    Runs the review and yields progress events as they happen:
+    started → fetched → triaged → embedded/reviewed/suggested (per file, with the
+    rendered report section) → summary → done (with the report path).
+
+    State is checkpointed after every step under the repo + commit SHA +
+    prompt version; if an earlier run of the same commit and prompts did not
+    finish, it is resumed (keeping its report path) instead of starting over
+    (unless REVIEW_RESUME=0).
+    """
     print(f"AI CODE REVIEW AGENT")
     print(f"   Repo: {repo_url}\n")
-    result = review_graph.invoke({"pr_url": repo_url})
-    return result["final_report"]
+    store   = get_result_store()
+    run_key = f"{review_key(repo_url)}+{PROMPT_VERSION}"
+    run     = store.unfinished_run(run_key) if RESUME_ENABLED else None
+    config  = {"configurable": {"thread_id": run["thread_id"]}} if run else None
+
+    if config and review_graph.get_state(config).next:
+        print(f"[RESUME] Continuing unfinished run {run['thread_id']}")
+        inputs, report_path = None, run["report_path"]
+    else:
+        report_path = report_path or default_report_path()
+        ReportWriter(report_path).reset()  # a crashed earlier run (e.g. another commit) may have left parts
+        config      = {"configurable": {"thread_id": store.start_run(run_key, report_path)}}
+        inputs      = {
+            "pr_url":      repo_url,
+            "run_key":     run_key,
+            "report_path": report_path,
+            "cache_start": get_llm_cache().snapshot()
+        }
+    yield {"event": "started", "repo": repo_url, "report_path": report_path, "resumed": inputs is None}
+
+    # JSON run trace (stage times, LLM calls, GitHub usage) lands next to the report
+    trace_path = os.path.splitext(report_path)[0] + ".trace.json"
+    token      = start_trace(repo=repo_url, run_key=run_key)
+    try:
+        for mode, chunk in review_graph.stream(inputs,
+                                               config={**config, "max_concurrency": LLM_CONCURRENCY},
+                                               stream_mode=["updates", "custom"]):
+            if mode == "custom":
+                yield chunk
+            elif "fetcher" in chunk:
+                update = chunk["fetcher"]
+                yield {"event": "fetched", "title": update["pr_info"]["title"],
+                       "files": [f["filename"] for f in update["files"]]}
+            elif "summariser" in chunk:
+                store.finish_run(config["configurable"]["thread_id"])
+                yield {"event": "done", "report_path": chunk["summariser"]["report_path"]}
+    finally:
+        end_trace(token, trace_path)
+
+def run_review(repo_url: str, report_path: str | None = None) -> str:
+    """Runs the review and returns the path of the written markdown report."""
+    for event in stream_review(repo_url, report_path):
+        if event["event"] == "done":
+            return event["report_path"]
+    raise RuntimeError("Review finished without writing a report")
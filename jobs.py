@@ -0,0 +1,148 @@
+# jobs.py
+import os
+import time
+import uuid
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from checkpoints import review_key
+from config import CACHE_DIR, JOB_WORKERS, JOB_QUEUE_MAX
+
+JOBS_DB_PATH = os.path.join(CACHE_DIR, "jobs.sqlite")
+
+class QueueFull(Exception):
+    pass
+
+class JobQueue:
+    """
+    In-process review queue backed by SQLite (no external broker).
+    A bounded thread pool runs the jobs; identical in-flight requests
+    (same repo + commit SHA) share one job.
+    `streamer(pr_url, report_path)` must yield progress events ending with
+    {"event": "done", "report_path": ...} (see graph.review_graph.stream_review).
+    """
+
+    def __init__(self, streamer, path: str = JOBS_DB_PATH,
+                 workers: int = JOB_WORKERS, max_pending: int = JOB_QUEUE_MAX):
+        self.streamer    = streamer
+        self.max_pending = max_pending
+        self._lock       = threading.Lock()
+        self._events     = {}  # job_id -> progress events of running jobs (dropped when they end)
+        self._changed    = threading.Condition()
+        self._pool       = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="review-job")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY, pr_url TEXT, review_key TEXT, status TEXT,
+            report_path TEXT, error TEXT, created REAL, started REAL, finished REAL)""")
+        self._db.commit()
+
+        # Jobs interrupted by a restart go back on the queue
+        for (job_id,) in self._db.execute(
+                "SELECT id FROM jobs WHERE status IN ('queued', 'running') ORDER BY created").fetchall():
+            self._set(job_id, status="queued")
+            self._pool.submit(self._run, job_id)
+
+    def _set(self, job_id: str, **fields):
+        with self._lock:
+            cols = ", ".join(f"{k} = ?" for k in fields)
+            self._db.execute(f"UPDATE jobs SET {cols} WHERE id = ?", (*fields.values(), job_id))
+            self._db.commit()
+
+    def submit(self, pr_url: str) -> tuple[dict, bool]:
+        """Queue a review. Returns (job, coalesced); raises QueueFull past max_pending."""
+        key = review_key(pr_url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id FROM jobs WHERE review_key = ? AND status IN ('queued', 'running')",
+                (key,)).fetchone()
+            if row:
+                job_id, coalesced = row[0], True
+            else:
+                pending = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
+                if pending >= self.max_pending:
+                    raise QueueFull(f"{pending} reviews already queued or running")
+                job_id, coalesced = uuid.uuid4().hex, False
+                self._db.execute(
+                    "INSERT INTO jobs (id, pr_url, review_key, status, created) VALUES (?, ?, ?, 'queued', ?)",
+                    (job_id, pr_url, key, time.time()))
+                self._db.commit()
+        if not coalesced:
+            self._pool.submit(self._run, job_id)
+        return self.get(job_id), coalesced
+
+    def _publish(self, job_id: str, event: dict):
+        with self._changed:
+            self._events.setdefault(job_id, []).append(event)
+            self._changed.notify_all()
+
+    def _run(self, job_id: str):
+        job = self.get(job_id)
+        self._set(job_id, status="running", started=time.time())
+        try:
+            path = None
+            # Own report file per job: concurrent jobs must never share a path / spool
+            for event in self.streamer(job["pr_url"], f"review_{job_id}.md"):
+                self._publish(job_id, event)
+                if event["event"] == "done":
+                    path = event["report_path"]
+            if path is None:
+                raise RuntimeError("Review finished without writing a report")
+            self._set(job_id, status="done", report_path=path, finished=time.time())
+        except Exception as e:
+            error = f"{e.__class__.__name__}: {e}"
+            self._set(job_id, status="failed", error=error, finished=time.time())
+            self._publish(job_id, {"event": "failed", "error": error})
+        finally:
+            # The outcome is in SQLite now; events() rebuilds the terminal event from it
+            with self._changed:
+                self._events.pop(job_id, None)
+                self._changed.notify_all()
+
+    def events(self, job_id: str, timeout: float = 15.0):
+        """
+        Yields the job's progress events from the beginning, then live ones,
+        until it is done or failed. Yields None after `timeout` seconds of
+        silence so callers can send keep-alives.
+        """
+        seen = 0
+        while True:
+            with self._changed:
+                log = self._events.get(job_id)
+                if log is None:
+                    # Not started yet, or finished (its log is dropped then): only the outcome is left
+                    job = self.get(job_id)
+                    if job is None:
+                        return
+                    if job["status"] == "done":
+                        log, seen = [{"event": "done", "report_path": job["report_path"]}], 0
+                    elif job["status"] == "failed":
+                        log, seen = [{"event": "failed", "error": job["error"]}], 0
+                    else:
+                        log = []
+                if len(log) <= seen:
+                    self._changed.wait(timeout)
+                    log = self._events.get(job_id, log)
+                pending = log[seen:]
+            if not pending:
+                yield None
+                continue
+            for event in pending:
+                seen += 1
+                yield event
+                if event["event"] in ("done", "failed"):
+                    return
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            cur = self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,))
+            row = cur.fetchone()
+            if row is None:
+                return None
+            return dict(zip([c[0] for c in cur.description], row))
+
+    def depth(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')").fetchone()[0]
@@ -1,13 +1,89 @@
 # llm.py
-from langchain_openai import ChatOpenAI
-from config import LM_STUDIO_URL, LM_MODEL
+import asyncio
+import threading
+from llm_cache import SQLiteLLMCache
+from endpoints import PooledChatModel, get_pool
+from metrics import METRICS_CALLBACK, bind
+from scheduler import LLM_REQUESTS
+from config import (LM_MODEL, LLM_CONCURRENCY, LLM_REQUEST_TIMEOUT, ENDPOINT_ATTEMPTS,
+                    LLM_CACHE_BYPASS, COMPLETION_TOKENS)
 
-def get_llm(temperature: float = 0.1) -> ChatOpenAI:
-    return ChatOpenAI(
-        base_url=LM_STUDIO_URL,
-        api_key="lm-studio",
+LLM_ERROR_PREFIX = "⚠️ LLM call failed"
+
+# Backstop for a whole call: every endpoint attempt gets its own client timeout
+# first, so a hung server is ejected and retried elsewhere before this fires
+CALL_TIMEOUT = ENDPOINT_ATTEMPTS * LLM_REQUEST_TIMEOUT + 30
+
+_cache = None
+
+def get_llm_cache() -> SQLiteLLMCache:
+    global _cache
+    if _cache is None:
+        _cache = SQLiteLLMCache()
+    return _cache
+
+def get_llm(temperature: float = 0.1, use_cache: bool = True,
+            max_tokens: int = COMPLETION_TOKENS) -> PooledChatModel:
+    """Chat model spread over every LLM_ENDPOINTS server (see endpoints.py)."""
+    return PooledChatModel(
+        get_pool("llm"),
         model=LM_MODEL,
         temperature=temperature,
-        max_tokens=2048,
-        timeout=300
+        max_tokens=max_tokens,
+        timeout=LLM_REQUEST_TIMEOUT,
+        # False (not None) so a global langchain cache can't sneak in either
+        cache=get_llm_cache() if use_cache and not LLM_CACHE_BYPASS else False,
+        callbacks=[METRICS_CALLBACK]
     )
+
+def is_failed(text: str) -> bool:
+    return text.startswith(LLM_ERROR_PREFIX)
+
+def invoke_safe(chain, inp: dict, metadata: dict | None = None) -> str:
+    """Single call with failure isolation: errors become an LLM_ERROR_PREFIX message."""
+    try:
+        return chain.invoke(inp, config={"metadata": metadata or {}}).content
+    except Exception as e:
+        return f"{LLM_ERROR_PREFIX}: {e.__class__.__name__}: {e}"
+
+def _run_coroutine(coro):
+    """asyncio.run, but also safe when the caller already has a running loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    result = {}
+    thread = threading.Thread(target=bind(lambda: result.setdefault("value", asyncio.run(coro))))
+    thread.start()
+    thread.join()
+    return result["value"]
+
+def invoke_all(chain, inputs: list[dict],
+               concurrency: int = LLM_CONCURRENCY,
+               timeout: float = CALL_TIMEOUT,
+               metadata: dict | None = None) -> list[str]:
+    """
+    Run `chain` over every input with at most `concurrency` requests in flight
+    (and never more than the process-wide scheduler.LLM_REQUESTS allows).
+    Each call has its own timeout; a failed call yields an LLM_ERROR_PREFIX
+    message instead of aborting the others. Results keep input order.
+    """
+    async def run_one(semaphore, inp):
+        # The process-wide permit is taken outside the timeout: queueing is not the server being slow
+        async with semaphore, LLM_REQUESTS.ahold():
+            try:
+                result = await asyncio.wait_for(
+                    chain.ainvoke(inp, config={"metadata": metadata or {}}), timeout)
+                return result.content
+            except asyncio.TimeoutError:
+                return f"{LLM_ERROR_PREFIX}: timed out after {timeout:.0f}s"
+            except Exception as e:
+                return f"{LLM_ERROR_PREFIX}: {e.__class__.__name__}: {e}"
+
+    async def run_all():
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+        return await asyncio.gather(*(run_one(semaphore, inp) for inp in inputs))
+
+    if not inputs:
+        return []
+    return _run_coroutine(run_all())
@@ -0,0 +1,95 @@
+# llm_cache.py
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from config import CACHE_DIR, LLM_CACHE_TTL_HOURS, LLM_CACHE_MAX_MB
+
+LLM_CACHE_PATH = os.path.join(CACHE_DIR, "llm_cache.sqlite")
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Persistent LLM response cache.
+    LangChain hands us the rendered prompt plus an `llm_string` that already
+    encodes model, temperature and max_tokens, so the key is a hash of both.
+    Entries expire after `ttl_seconds`; least-recently-used rows are evicted
+    once the table grows past `max_bytes`.
+    """
+
+    def __init__(self, path: str = LLM_CACHE_PATH,
+                 ttl_seconds: float = LLM_CACHE_TTL_HOURS * 3600,
+                 max_bytes: int = LLM_CACHE_MAX_MB * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes   = max_bytes
+        self.stats       = {"hits": 0, "misses": 0}
+        self._lock       = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS responses ("
+                         "key TEXT PRIMARY KEY, value TEXT, created REAL, last_used REAL)")
+        self._db.commit()
+        # Running size of the table, so a write does not have to scan it
+        self._bytes = self._table_bytes()
+
+    def _table_bytes(self) -> int:
+        return self._db.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def _key(prompt: str, llm_string: str) -> str:
+        return hashlib.sha256(f"{llm_string}\0{prompt}".encode("utf-8")).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str):
+        key, now = self._key(prompt, llm_string), time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, created FROM responses WHERE key = ?",
+                                   (key,)).fetchone()
+            if row and now - row[1] > self.ttl_seconds:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._db.commit()
+                self._bytes -= len(row[0])
+                row = None
+            if row is None:
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self.stats["hits"] += 1
+        return [loads(g) for g in json.loads(row[0])]
+
+    def update(self, prompt: str, llm_string: str, return_val) -> None:
+        key, now = self._key(prompt, llm_string), time.time()
+        value    = json.dumps([dumps(g) for g in return_val])
+        with self._lock:
+            old = self._db.execute("SELECT LENGTH(value) FROM responses WHERE key = ?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                             (key, value, now, now))
+            self._bytes += len(value) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        """Drop least-recently-used rows down to 90% of max_bytes. Only runs once over the limit."""
+        # Re-sync first: other processes (API, batch) may share this file
+        self._bytes = self._table_bytes()
+        doomed = []
+        for key, size in self._db.execute("SELECT key, LENGTH(value) FROM responses ORDER BY last_used"):
+            if self._bytes <= self.max_bytes * 0.9:
+                break
+            doomed.append((key,))
+            self._bytes -= size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", doomed)
+
+    def clear(self, **kwargs) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+            self._bytes = 0
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
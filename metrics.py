@@ -0,0 +1,152 @@
+# metrics.py
+import json
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+
+# ── Process-wide Prometheus-style registry ──
+_lock     = threading.Lock()
+_counters = {}  # (name, labels) -> value
+_gauges   = {}
+_timings  = {}  # (name, labels) -> [count, sum]
+_help     = {}
+
+def _key(name: str, labels: dict) -> tuple:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def inc(name: str, value: float = 1, help: str = "", **labels):
+    with _lock:
+        key = _key(name, labels)
+        _counters[key] = _counters.get(key, 0) + value
+        _help.setdefault(name, help)
+
+def set_gauge(name: str, value: float, help: str = "", **labels):
+    with _lock:
+        _gauges[_key(name, labels)] = value
+        _help.setdefault(name, help)
+
+def observe(name: str, seconds: float, help: str = "", **labels):
+    with _lock:
+        entry = _timings.setdefault(_key(name, labels), [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+        _help.setdefault(name, help)
+
+def render_prometheus() -> str:
+    """Text exposition format for GET /metrics."""
+    def fmt(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+    lines = []
+    with _lock:
+        for kind, table in (("counter", _counters), ("gauge", _gauges)):
+            for name in sorted({n for n, _ in table}):
+                lines += [f"# HELP {name} {_help.get(name) or name}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{fmt(l)} {v}" for (n, l), v in sorted(table.items()) if n == name]
+        for name in sorted({n for n, _ in _timings}):
+            lines += [f"# HELP {name} {_help.get(name) or name}", f"# TYPE {name} summary"]
+            for (n, l), (count, total) in sorted(_timings.items()):
+                if n == name:
+                    lines += [f"{name}_count{fmt(l)} {count}", f"{name}_sum{fmt(l)} {total:.6f}"]
+    return "\n".join(lines) + "\n"
+
+# ── Per-run JSON trace ──
+_trace = contextvars.ContextVar("review_trace", default=None)
+
+def start_trace(**info) -> contextvars.Token:
+    trace = {
+        **info,
+        "started":  time.time(),
+        "stages":   [],
+        "llm":      [],
+        "github":   {"requests": 0, "by_status": {}, "rate_limit_remaining": None},
+        "embeddings": {"batches": 0, "texts": 0, "seconds": 0.0},
+        "endpoints": {},
+        "_lock":    threading.Lock()
+    }
+    return _trace.set(trace)
+
+def end_trace(token: contextvars.Token, path: str | None = None) -> dict | None:
+    trace = _trace.get()
+    _trace.reset(token)
+    if trace is None:
+        return None
+    trace.pop("_lock", None)
+    trace["finished"]     = time.time()
+    trace["wall_seconds"] = trace["finished"] - trace["started"]
+    if path:
+        with open(path, "w", encoding="utf-8") as out:
+            json.dump(trace, out, indent=2, default=str)
+    return trace
+
+def record(section: str, **data):
+    """Append an entry to a list section of the current run's trace."""
+    trace = _trace.get()
+    if trace is not None:
+        with trace["_lock"]:
+            trace[section].append(data)
+
+def update(section: str, fn):
+    """Mutate a dict section of the current run's trace under its lock."""
+    trace = _trace.get()
+    if trace is not None:
+        with trace["_lock"]:
+            fn(trace[section])
+
+def bind(fn):
+    """Run `fn` in (a copy of) the caller's context — for our own thread pools."""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(fn, *args, **kwargs)
+
+@contextmanager
+def timed(stage: str, file: str | None = None):
+    """Wall time of a pipeline stage → review_stage_seconds + the run trace."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        observe("review_stage_seconds", seconds, "Wall time per pipeline stage", stage=stage)
+        entry = {"stage": stage, "seconds": round(seconds, 4)}
+        if file:
+            entry["file"] = file
+        record("stages", **entry)
+
+# ── LLM instrumentation ──
+class MetricsCallback(BaseCallbackHandler):
+    """Latency and token counts for every chat-model call."""
+    run_inline = True
+
+    def __init__(self):
+        self._started = {}
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, metadata=None, **kwargs):
+        self._started[run_id] = (time.perf_counter(), metadata or {})
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        start, meta = self._started.pop(run_id, (None, {}))
+        seconds = time.perf_counter() - start if start else 0.0
+        usage   = (response.llm_output or {}).get("token_usage") or {}
+        stage   = meta.get("stage", "llm")
+        cached  = response.llm_output is None  # cache hits never reach the server
+        prompt, completion = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+
+        inc("review_llm_calls_total", 1, "LLM calls", stage=stage, cached=str(cached).lower())
+        inc("review_llm_prompt_tokens_total", prompt, "Prompt tokens sent", stage=stage)
+        inc("review_llm_completion_tokens_total", completion, "Completion tokens generated", stage=stage)
+        if not cached:
+            observe("review_llm_seconds", seconds, "LLM call latency", stage=stage)
+        record("llm", stage=stage, file=meta.get("file"), seconds=round(seconds, 3),
+               prompt_tokens=prompt, completion_tokens=completion, cached=cached)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        _, meta = self._started.pop(run_id, (None, {}))
+        inc("review_llm_errors_total", 1, "Failed LLM calls",
+            stage=meta.get("stage", "llm"), error=error.__class__.__name__)
+
+METRICS_CALLBACK = MetricsCallback()
@@ -0,0 +1,120 @@
+# rag/ast_chunker.py
+import ast
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+MAX_CHUNK_CHARS = 4000  # giant functions are split further, keeping their name
+
+_fallback = RecursiveCharacterTextSplitter(
+    chunk_size=500,
+    chunk_overlap=50,
+    separators=["\ndef ", "\nclass ", "\n\n", "\n", " "]
+)
+
+def _chunk(lines: list[str], name: str, kind: str, start: int, end: int) -> dict:
+    return {
+        "name":  name,
+        "kind":  kind,
+        "start": start,
+        "end":   end,
+        "text":  "\n".join(lines[start - 1:end])
+    }
+
+def _node_start(node) -> int:
+    """First line including decorators."""
+    return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])])
+
+def _python_chunks(source: str, lines: list[str]) -> list[dict]:
+    tree   = ast.parse(source)
+    chunks = []
+    for node in tree.body:
+        start, end = _node_start(node), node.end_lineno
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            chunks.append(_chunk(lines, node.name, "function", start, end))
+        elif isinstance(node, ast.ClassDef):
+            methods = [n for n in node.body
+                       if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+            # Class chunk = header + class attributes up to the first method
+            header_end = _node_start(methods[0]) - 1 if methods else end
+            chunks.append(_chunk(lines, node.name, "class", start, max(start, header_end)))
+            for m in methods:
+                chunks.append(_chunk(lines, f"{node.name}.{m.name}", "method",
+                                     _node_start(m), m.end_lineno))
+
+    # Everything between definitions (imports, constants, comments) becomes module chunks
+    filled, line = [], 1
+    for c in chunks + [None]:
+        gap_end = c["start"] - 1 if c else len(lines)
+        if gap_end >= line and any(l.strip() for l in lines[line - 1:gap_end]):
+            filled.append(_chunk(lines, "<module>", "module", line, gap_end))
+        if c:
+            filled.append(c)
+            line = max(line, c["end"] + 1)
+    return filled
+
+def _text_chunks(source: str) -> list[dict]:
+    """Fallback for non-Python / unparsable files: character chunks with line ranges."""
+    chunks, offset = [], 0
+    for text in _fallback.split_text(source):
+        pos    = source.find(text, offset)
+        pos    = pos if pos >= 0 else offset
+        start  = source.count("\n", 0, pos) + 1
+        end    = start + text.count("\n")
+        offset = pos + 1
+        chunks.append({"name": "<text>", "kind": "text", "start": start, "end": end, "text": text})
+    return chunks
+
+def chunk_code(filename: str, source: str) -> list[dict]:
+    """
+    Whole functions, methods and classes with qualified names and line ranges.
+    Returns [{"name", "kind", "start", "end", "text"}].
+    """
+    if filename.endswith(".py"):
+        try:
+            chunks = _python_chunks(source, source.splitlines())
+        except SyntaxError:
+            return _text_chunks(source)
+        out = []
+        for c in chunks:
+            if len(c["text"]) <= MAX_CHUNK_CHARS or c["kind"] == "text":
+                out.append(c)
+                continue
+            for i, part in enumerate(_text_chunks(c["text"])):
+                out.append({**part, "name": c["name"], "kind": c["kind"],
+                            "start": c["start"] + part["start"] - 1,
+                            "end":   c["start"] + part["end"] - 1})
+        return [c for c in out if c["text"].strip()]
+    return _text_chunks(source)
+
+def referenced_names(filename: str, source: str) -> set[str]:
+    """Names this file calls or imports — candidates for cross-file context."""
+    if not filename.endswith(".py"):
+        return set()
+    try:
+        tree = ast.parse(source)
+    except SyntaxError:
+        return set()
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Call):
+            if isinstance(node.func, ast.Name):
+                names.add(node.func.id)
+            elif isinstance(node.func, ast.Attribute):
+                names.add(node.func.attr)
+        elif isinstance(node, ast.ImportFrom):
+            names.update(a.name for a in node.names)
+    return names
+
+def add_symbols(index: dict[str, list[dict]], filename: str, source: str, sha: str):
+    """
+    Add one file's definitions to a symbol index: short name ->
+    [{"file", "sha", "name", "kind", "start", "end"}] for every
+    function/method/class. Files are indexed as they stream in; lookups need
+    no embedding call.
+    """
+    for c in chunk_code(filename, source):
+        if c["kind"] in ("function", "method", "class"):
+            short = c["name"].rsplit(".", 1)[-1]
+            entry = {"file": filename, "sha": sha, "name": c["name"], "kind": c["kind"],
+                     "start": c["start"], "end": c["end"]}
+            if entry not in index.setdefault(short, []):
+                index[short].append(entry)
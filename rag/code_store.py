@@ -1,68 +1,178 @@
-
 # rag/code_store.py
 from langchain_community.vectorstores import Chroma
-from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
-from langchain_openai import OpenAIEmbeddings
-from config import LM_STUDIO_URL
-import os, shutil
+from rag.embeddings import CachedEmbeddings, count_embeddings
+from rag.ast_chunker import chunk_code, referenced_names
+from rag.lexical import get_lexical_index, is_identifier_query
+from tools.file_store import load_content
+from metrics import inc
+from endpoints import PooledEmbeddings, get_pool
+from config import EMBED_MODEL, RRF_K
+import os, re, hashlib, threading
 
 CHROMA_DIR = "chroma_code_review"
-LM_STUDIO_URL = "http://127.0.0.1:1234/v1"   
-def build_code_index(files: list[dict], owner: str, repo: str) -> Chroma:
-    print("\n[RAG] Building code index...")
-
-    if os.path.exists(CHROMA_DIR):
-        shutil.rmtree(CHROMA_DIR)
-
-    splitter = RecursiveCharacterTextSplitter(
-        chunk_size=500,
-        chunk_overlap=50,
-        separators=["\ndef ", "\nclass ", "\n\n", "\n", " "]
-    )
-
-    docs = []
-    for f in files:
-        content = f["content"]
-        if not isinstance(content, str) or not content.strip():
-            continue
-        #Force plain text only (strips any notebook JSON noise)
-        content = content.encode("utf-8", errors="ignore").decode("utf-8")
-        chunks = splitter.split_text(content)
-        for i, chunk in enumerate(chunks):
-            if chunk.strip():
-                docs.append(Document(
-                    page_content=str(chunk),
-                    metadata={
-                        "filename": str(f["filename"]),
-                        "chunk":    i,
-                        "repo":     f"{owner}/{repo}"
-                    }
-                ))
-
-    print(f"Indexed {len(docs)} chunks from {len(files)} files")
-
-    embeddings = OpenAIEmbeddings(
-        base_url=LM_STUDIO_URL,
-        api_key="lm-studio",
-        model="text-embedding-nomic-embed-text-v1.5",
-        check_embedding_ctx_length=False #disables token checking
-    )
-
-    #Embed in small batches to avoid overflow
-    vectorstore = Chroma.from_documents(
-        documents=docs,
-        embedding=embeddings,
-        persist_directory=CHROMA_DIR,
-        collection_metadata={"hnsw:space": "cosine"}
-    )
-
-    print("[RAG] Code index ready!")
-    return vectorstore
-
-def query_code(vectorstore, query: str, k: int = 4) -> str:
-    docs = vectorstore.similarity_search(query, k=k)
+
+_embeddings = None
+
+def get_embeddings() -> CachedEmbeddings:
+    global _embeddings
+    if _embeddings is None:
+        _embeddings = CachedEmbeddings(PooledEmbeddings(get_pool("embed"), EMBED_MODEL), EMBED_MODEL)
+    return _embeddings
+
+def _collection_name(owner: str, repo: str) -> str:
+    # Chroma: 3-63 chars of [A-Za-z0-9_-], starting and ending alphanumeric
+    name = re.sub(r"[^A-Za-z0-9_-]", "-", f"{owner}__{repo}")[:63].strip("-_")
+    return name if len(name) >= 3 else f"repo-{name}"
+
+_open_indexes = {}
+_open_lock    = threading.Lock()
+
+def open_code_index(owner: str, repo: str) -> Chroma:
+    """Open (or create) the persistent index for one owner/repo, once per process."""
+    name = _collection_name(owner, repo)
+    with _open_lock:
+        if name not in _open_indexes:
+            _open_indexes[name] = Chroma(
+                collection_name=name,
+                embedding_function=get_embeddings(),
+                persist_directory=os.path.join(CHROMA_DIR, name),
+                collection_metadata={"hnsw:space": "cosine"}
+            )
+        return _open_indexes[name]
+
+def _chunk_id(f: dict, chunk: str) -> str:
+    """Stable ID: blob SHA + chunk hash (+ path, so duplicate files don't collide)."""
+    sha        = f.get("sha") or hashlib.sha1(f["content"].encode()).hexdigest()
+    path_hash  = hashlib.sha1(f["filename"].encode()).hexdigest()[:8]
+    chunk_hash = hashlib.sha1(chunk.encode()).hexdigest()[:16]
+    return f"{sha[:12]}-{path_hash}-{chunk_hash}"
+
+def _file_documents(f: dict, owner: str, repo: str) -> dict[str, Document]:
+    content = f["content"]
+    if not isinstance(content, str) or not content.strip():
+        return {}
+    #Force plain text only (strips any notebook JSON noise)
+    content = content.encode("utf-8", errors="ignore").decode("utf-8")
+    docs = {}
+    for i, c in enumerate(chunk_code(f["filename"], content)):
+        docs[_chunk_id(f, c["text"])] = Document(
+            page_content=c["text"],
+            metadata={
+                "filename":   str(f["filename"]),
+                "sha":        str(f.get("sha", "")),
+                "chunk":      i,
+                "symbol":     c["name"],
+                "kind":       c["kind"],
+                "start_line": c["start"],
+                "end_line":   c["end"],
+                "repo":       f"{owner}/{repo}"
+            }
+        )
+    return docs
+
+def prune_code_index(files: list[dict], owner: str, repo: str) -> int:
+    """Remove chunks of files that were deleted or changed since the last run."""
+    vectorstore = open_code_index(owner, repo)
+    current     = {(f["filename"], str(f.get("sha", ""))) for f in files}
+    existing    = vectorstore.get(include=["metadatas"])
+    stale = [cid for cid, meta in zip(existing["ids"], existing["metadatas"])
+             if (meta.get("filename"), meta.get("sha", "")) not in current]
+    if stale:
+        vectorstore.delete(ids=stale)
+    get_lexical_index().prune(_collection_name(owner, repo), current)
+    return len(stale)
+
+def index_file(f: dict, owner: str, repo: str) -> tuple[Chroma, dict]:
+    """Embed only the chunks of one file that are not in the index yet (stats of this call only)."""
+    vectorstore = open_code_index(owner, repo)
+    docs        = _file_documents(f, owner, repo)
+    stats       = {}
+    if docs:
+        existing = set(vectorstore.get(ids=list(docs), include=[])["ids"])
+        new      = [cid for cid in docs if cid not in existing]
+        if new:
+            with count_embeddings() as stats:
+                vectorstore.add_documents([docs[cid] for cid in new], ids=new)
+        # Same chunks, BM25-indexed locally (checked separately: the lexical index may be newer than Chroma's)
+        get_lexical_index().add(_collection_name(owner, repo), docs)
+    return vectorstore, stats
+
+def _format_chunk(filename: str, meta: dict, text: str) -> str:
+    where = meta.get("symbol") or f"chunk {meta.get('chunk')}"
+    lines = f"L{meta['start_line']}-{meta['end_line']}" if "start_line" in meta else ""
+    return f"# {filename} :: {where} {lines}\n{text}"
+
+def search_code(vectorstore, owner: str, repo: str, query: str, k: int = 4,
+                exclude_file: str = "", known=()) -> list[Document]:
+    """
+    Hybrid retrieval over owner/repo's index. Identifier-style queries (see
+    is_identifier_query; `known` = names in the symbol index) are answered
+    from the BM25 index alone when it has a match (no embedding call);
+    anything else fuses the BM25 and embedding rankings with reciprocal rank
+    fusion.
+    """
+    lexical = get_lexical_index().search(_collection_name(owner, repo), query, k=2 * k,
+                                         exclude_file=exclude_file)
+    if lexical and is_identifier_query(query, known):
+        inc("retrieval_queries_total", help="Code retrieval queries", mode="lexical")
+        return lexical[:k]
+
+    where  = {"filename": {"$ne": exclude_file}} if exclude_file else None
+    vector = vectorstore.similarity_search(query, k=2 * k, filter=where)
+    inc("retrieval_queries_total", help="Code retrieval queries", mode="hybrid")
+
+    scores, docs = {}, {}
+    for ranking in (lexical, vector):
+        for rank, d in enumerate(ranking):
+            key          = (d.metadata["filename"], d.metadata.get("chunk"))
+            scores[key]  = scores.get(key, 0.0) + 1.0 / (RRF_K + rank + 1)
+            docs.setdefault(key, d)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)[:k]]
+
+def query_code(vectorstore, owner: str, repo: str, query: str, k: int = 4,
+               exclude_file: str = "", known=()) -> str:
+    """Hybrid lexical + embedding search (see search_code) — for cross-file context."""
     return "\n\n".join([
-        f"# {d.metadata['filename']} (chunk {d.metadata['chunk']})\n{d.page_content}"
-        for d in docs
+        _format_chunk(d.metadata["filename"], d.metadata, d.page_content)
+        for d in search_code(vectorstore, owner, repo, query, k=k, exclude_file=exclude_file, known=known)
     ])
+
+def symbol_source(entry: dict, repo: str, ref: str) -> str:
+    """
+    Source of a symbol-index entry, cut from the file body by its line range.
+    Read from the file store, so it does not depend on whether that file's
+    chunks have been embedded yet.
+    """
+    content = load_content({"filename": entry["file"], "sha": entry["sha"], "repo": repo, "ref": ref})
+    text    = "\n".join(content.splitlines()[entry["start"] - 1:entry["end"]])
+    if not text.strip():
+        return ""
+    meta = {"symbol": entry["name"], "start_line": entry["start"], "end_line": entry["end"]}
+    return _format_chunk(entry["file"], meta, text)
+
+def related_code(f: dict, vectorstore, symbols: dict, max_chars: int = 1500) -> str:
+    """
+    Definitions from OTHER files that this file calls or imports.
+    Resolved through the symbol index first; a search for the referenced
+    names (lexical, so no embedding call) is only used when nothing resolves
+    directly.
+    """
+    parts, used = [], 0
+    for name in sorted(referenced_names(f["filename"], f["content"])):
+        for entry in symbols.get(name, []):
+            if entry["file"] == f["filename"]:
+                continue
+            text = symbol_source(entry, f["repo"], f["ref"])
+            if text and used + len(text) <= max_chars:
+                parts.append(text)
+                used += len(text)
+            break
+    if not parts and vectorstore:
+        names = sorted(referenced_names(f["filename"], f["content"]))[:10]
+        if names:
+            owner, repo = f["repo"].split("/", 1)
+            text = query_code(vectorstore, owner, repo, " ".join(names), k=2,
+                              exclude_file=f["filename"], known=symbols)
+            parts.append(text[:max_chars])
+    return "\n\n".join(parts)
@@ -0,0 +1,139 @@
+# rag/embeddings.py
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import contextvars
+from array import array
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
+from metrics import inc, observe, update
+from config import CACHE_DIR, EMBED_BATCH_SIZE, EMBED_WORKERS
+
+EMBED_CACHE_PATH = os.path.join(CACHE_DIR, "embeddings.sqlite")
+
+# Counters of the innermost count_embeddings() block in this thread / task
+_counts = contextvars.ContextVar("embedding_counts", default=None)
+
+@contextmanager
+def count_embeddings():
+    """
+    Hits / misses / seconds of just the embedding calls made inside the block
+    by this thread, not by concurrent workers sharing the process-wide cache.
+    """
+    counts = {"hits": 0, "misses": 0, "seconds": 0.0}
+    token  = _counts.set(counts)
+    try:
+        yield counts
+    finally:
+        _counts.reset(token)
+        counts["per_second"] = counts["misses"] / counts["seconds"] if counts["seconds"] else 0.0
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings client with a local vector cache keyed by
+    (model, content hash), shared across repos, and sends cache misses in
+    fixed-size batches over a bounded number of parallel requests.
+    """
+
+    def __init__(self, inner: Embeddings, model: str,
+                 batch_size: int = EMBED_BATCH_SIZE,
+                 workers: int = EMBED_WORKERS,
+                 path: str = EMBED_CACHE_PATH):
+        self.inner      = inner
+        self.model      = model
+        self.batch_size = batch_size
+        self.workers    = workers
+        self._lock      = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings "
+                         "(key TEXT PRIMARY KEY, vector BLOB)")
+        self._db.commit()
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode("utf-8")).hexdigest()
+
+    def _lookup(self, keys: list[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):  # stay under SQLite's variable limit
+                part = keys[i:i + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def _store(self, items: dict[str, list[float]]):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(k, array("f", v).tobytes()) for k, v in items.items()]
+            )
+            self._db.commit()
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        keys    = [self._key(t) for t in texts]
+        vectors = self._lookup(list(set(keys)))
+
+        # Unique misses only — identical chunks are embedded once
+        todo = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                todo.setdefault(key, text)
+
+        seconds = 0.0
+        if todo:
+            start   = time.perf_counter()
+            pending = list(todo.items())
+            batches = [pending[i:i + self.batch_size]
+                       for i in range(0, len(pending), self.batch_size)]
+            embed   = lambda batch: self.inner.embed_documents([t for _, t in batch])
+            with ThreadPoolExecutor(max_workers=max(1, min(self.workers, len(batches)))) as pool:
+                for batch, result in zip(batches, pool.map(embed, batches)):
+                    fresh = {key: vec for (key, _), vec in zip(batch, result)}
+                    vectors.update(fresh)
+                    self._store(fresh)
+            seconds = time.perf_counter() - start
+            inc("embeddings_computed_total", len(todo), "Texts sent to the embedding model")
+            observe("embedding_request_seconds", seconds, "Wall time embedding cache misses")
+
+            def add(emb):
+                emb["batches"] += len(batches)
+                emb["texts"]   += len(todo)
+                emb["seconds"] += seconds
+            update("embeddings", add)
+
+        inc("embedding_cache_hits_total", len(texts) - len(todo), "Embedding cache hits")
+        counts = _counts.get()
+        if counts is not None:
+            counts["hits"]    += len(texts) - len(todo)
+            counts["misses"]  += len(todo)
+            counts["seconds"] += seconds
+        return [vectors[k] for k in keys]
+
+    def embed_query(self, text: str) -> list[float]:
+        # Own key space: some models embed queries differently from documents
+        key = self._key(f"query\0{text}")
+        hit = self._lookup([key]).get(key)
+        inc("embedding_query_cache_hits_total" if hit else "embedding_query_cache_misses_total", 1,
+            "Query embedding cache lookups")
+        if hit is None:
+            hit = self.inner.embed_query(text)
+            self._store({key: hit})
+        return hit
+
+def merge_stats(a: dict | None, b: dict | None) -> dict:
+    """Graph reducer: add up embedding stats coming from parallel file workers."""
+    if not a:
+        return b or {}
+    if not b:
+        return a
+    total = {k: a.get(k, 0) + b.get(k, 0) for k in ("hits", "misses", "seconds")}
+    total["per_second"] = total["misses"] / total["seconds"] if total["seconds"] else 0.0
+    return total
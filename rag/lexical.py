@@ -0,0 +1,98 @@
+# rag/lexical.py
+import os
+import re
+import json
+import sqlite3
+import threading
+from langchain_core.documents import Document
+from config import CACHE_DIR
+
+LEXICAL_DB_PATH = os.path.join(CACHE_DIR, "lexical.sqlite")
+TERM_RE         = re.compile(r"\w+")
+IDENTIFIER_RE   = re.compile(r"^[A-Za-z_][\w.]*$")
+CODE_LIKE_RE    = re.compile(r"[_.]|[a-z][A-Z]")
+
+def is_identifier_query(query: str, known=()) -> bool:
+    """
+    A single name, or names that all look like code (snake_case, dotted,
+    camelCase, or in `known`, e.g. the symbol index): an exact lexical match
+    is the right answer. Prose always goes through fusion with vector search.
+    """
+    terms = query.split()
+    if not terms or not all(IDENTIFIER_RE.match(t) for t in terms):
+        return False
+    return len(terms) == 1 or all(CODE_LIKE_RE.search(t) or t in known for t in terms)
+
+class LexicalIndex:
+    """
+    BM25 full-text index (SQLite FTS5) over the same chunks as the Chroma
+    index, one table shared by every repo. `_` is a token character so
+    snake_case identifiers match whole; the symbol name is weighted above
+    the chunk body. Queries are local: no embedding call.
+    """
+
+    def __init__(self, path: str = LEXICAL_DB_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._lock = threading.Lock()
+        self._db   = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+            id UNINDEXED, repo UNINDEXED, filename UNINDEXED, sha UNINDEXED,
+            symbol, text, meta UNINDEXED, tokenize = "unicode61 tokenchars '_'")""")
+        # FTS5 has no unique constraint: chunk_ids is the one that keeps a chunk from being indexed twice
+        fresh = self._db.execute("SELECT 1 FROM sqlite_master WHERE name = 'chunk_ids'").fetchone() is None
+        self._db.execute("CREATE TABLE IF NOT EXISTS chunk_ids (repo TEXT, id TEXT, PRIMARY KEY (repo, id))")
+        if fresh:
+            self._db.execute("INSERT OR IGNORE INTO chunk_ids SELECT repo, id FROM chunks")
+        self._db.commit()
+
+    def add(self, repo: str, docs: dict[str, Document]) -> int:
+        """Index the chunks not indexed yet; check and insert are one transaction. Returns how many were new."""
+        added = 0
+        with self._lock, self._db:
+            for cid, d in docs.items():
+                if self._db.execute("INSERT OR IGNORE INTO chunk_ids VALUES (?, ?)", (repo, cid)).rowcount:
+                    self._db.execute(
+                        "INSERT INTO chunks VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (cid, repo, d.metadata["filename"], d.metadata.get("sha", ""),
+                         d.metadata.get("symbol") or "", d.page_content, json.dumps(d.metadata)))
+                    added += 1
+        return added
+
+    def prune(self, repo: str, current: set[tuple[str, str]]) -> int:
+        """Drop chunks whose (filename, sha) is no longer in the repo."""
+        with self._lock:
+            rows  = self._db.execute("SELECT rowid, id, filename, sha FROM chunks WHERE repo = ?",
+                                     (repo,)).fetchall()
+            stale = [(rowid, cid) for rowid, cid, filename, sha in rows if (filename, sha) not in current]
+            self._db.executemany("DELETE FROM chunks WHERE rowid = ?", [(rowid,) for rowid, _ in stale])
+            self._db.executemany("DELETE FROM chunk_ids WHERE repo = ? AND id = ?",
+                                 [(repo, cid) for _, cid in stale])
+            self._db.commit()
+        return len(stale)
+
+    def search(self, repo: str, query: str, k: int = 4, exclude_file: str = "") -> list[Document]:
+        """Best-first BM25 matches of any query term (symbol column weighted 5×)."""
+        terms = sorted(set(TERM_RE.findall(query)))
+        if not terms:
+            return []
+        match = " OR ".join(f'"{t}"' for t in terms)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id, text, meta FROM chunks WHERE chunks MATCH ? AND repo = ? AND filename != ? "
+                "ORDER BY bm25(chunks, 0, 0, 0, 0, 5.0, 1.0, 0) LIMIT ?",
+                (match, repo, exclude_file, 2 * k)).fetchall()
+        # Indexes written before chunk_ids existed may hold a chunk twice
+        seen, docs = set(), []
+        for cid, text, meta in rows:
+            if cid not in seen:
+                seen.add(cid)
+                docs.append(Document(page_content=text, metadata=json.loads(meta)))
+        return docs[:k]
+
+_index = None
+
+def get_lexical_index() -> LexicalIndex:
+    global _index
+    if _index is None:
+        _index = LexicalIndex()
+    return _index
@@ -0,0 +1,185 @@
+# report/findings.py
+import re
+import json
+from dataclasses import dataclass, field, asdict
+
+REVIEW_SECTIONS = [
+    "BUGS",
+    "SECURITY",
+    "PERFORMANCE",
+    "READABILITY / MAINTAINABILITY",
+    "POSITIVE OBSERVATIONS"
+]
+
+SEVERITY = {
+    "BUGS":                          "high",
+    "SECURITY":                      "high",
+    "PERFORMANCE":                   "medium",
+    "READABILITY / MAINTAINABILITY": "low",
+    "POSITIVE OBSERVATIONS":         "info"
+}
+
+# Field labels from REVIEW_PROMPT's output format, grouped by meaning
+MESSAGE_KEYS = {"problem", "risk", "issue", "what is done well"}
+DETAIL_KEYS  = {"why it is a bug", "exploit scenario", "cost", "why it is good practice"}
+FIX_KEYS     = {"suggested fix", "fix", "improvement"}
+
+FIELD_RE = re.compile(r"^[\s\-*]*\**\s*([A-Za-z][A-Za-z /']{1,30}?)\s*\**\s*:\s*\**\s*(.*)$")
+
+@dataclass(slots=True)
+class Finding:
+    filename: str
+    category: str
+    severity: str
+    line:     int | None
+    code:     str
+    message:  str
+    detail:   str = ""
+    fix:      str = ""
+    also_in:  list[str] = field(default_factory=list)  # filled by dedupe_findings
+
+def section_of(line: str) -> str | None:
+    """REVIEW_SECTIONS header this line opens, if any (tolerates markdown decoration)."""
+    bare = line.strip().strip("#*:_ ").upper()
+    if not bare or len(bare) > 40:
+        return None
+    for name in REVIEW_SECTIONS:
+        if bare.startswith(name.split(" ")[0]):
+            return name
+    return None
+
+def split_sections(review: str) -> dict[str, str]:
+    sections, current = {}, None
+    for line in review.splitlines():
+        header = section_of(line)
+        if header:
+            current = header
+            sections.setdefault(header, [])
+        elif current:
+            sections[current].append(line)
+    return {name: "\n".join(body).strip() for name, body in sections.items()}
+
+def is_empty(body: str) -> bool:
+    return not body or body.strip("-*_ .").lower().startswith(("none found", "not provable"))
+
+def _unwrap(value: str) -> str:
+    """Drop bold markers and one pair of backticks around the whole value — not a code span at either end."""
+    value = value.strip().strip("*").strip()
+    if len(value) > 1 and value[0] == value[-1] == "`" and "`" not in value[1:-1]:
+        value = value[1:-1]
+    return value
+
+def _items(body: str) -> list[dict[str, str]]:
+    """'- Line: ... / - Code: ...' blocks → one dict per finding, keys lower-cased."""
+    items, current, last = [], None, None
+    for line in body.splitlines():
+        match = FIELD_RE.match(line)
+        key   = match.group(1).strip().lower() if match else None
+        if key in MESSAGE_KEYS | DETAIL_KEYS | FIX_KEYS | {"line", "code"}:
+            if current is None or key == "line" or key in current:
+                current = {}
+                items.append(current)
+            current[key] = _unwrap(match.group(2))
+            last = key
+        elif current is not None and last and line.strip():
+            # continuation, e.g. a fenced code block under "Code:"
+            current[last] = (current[last] + "\n" + line.rstrip()).strip()
+    return items
+
+def _clean_code(code: str) -> str:
+    """Drop markdown fences (and their language tag) around a cited snippet."""
+    code = re.sub(r"^`{3}[\w+-]*\n?", "", code.strip())
+    return re.sub(r"\n?`{3}$", "", code).strip("`\n ")
+
+def _first(item: dict, keys: set[str]) -> str:
+    return next((item[k] for k in item if k in keys), "")
+
+def parse_findings(filename: str, review: str) -> list[Finding]:
+    """Structured findings from a REVIEW_PROMPT-formatted review."""
+    findings = []
+    for category, body in split_sections(review).items():
+        if is_empty(body):
+            continue
+        for item in _items(body):
+            message = _first(item, MESSAGE_KEYS)
+            if is_empty(message) and is_empty(item.get("code", "")):
+                continue
+            # "42", "L42", "line 42-45" — but not digits inside a quoted snippet
+            number = re.match(r"\W*(?:lines?|l)?\s*(\d+)", item.get("line", ""), re.I)
+            findings.append(Finding(
+                filename=filename,
+                category=category,
+                severity=SEVERITY[category],
+                line=int(number.group(1)) if number else None,
+                code=_clean_code(item.get("code", "")),
+                message=message,
+                detail=_first(item, DETAIL_KEYS),
+                fix=_first(item, FIX_KEYS)
+            ))
+    return findings
+
+def project_findings(findings: list[Finding], filename: str, content: str | None = None) -> list[Finding]:
+    """
+    A representative's findings restated for one of its duplicates. Exact
+    copies keep the line numbers; for near copies (`content` given) each line
+    is re-located by the first line of its cited snippet — a whole stripped
+    line, not a substring, so a short snippet cannot land anywhere — or left
+    unknown.
+    """
+    projected = []
+    for f in findings:
+        line = f.line
+        if content is not None:
+            first = f.code.strip().splitlines()[0].strip() if f.code.strip() else ""
+            line  = next((n for n, text in enumerate(content.splitlines(), 1) if first and text.strip() == first),
+                         None)
+        projected.append(Finding(filename, f.category, f.severity, line, f.code, f.message, f.detail, f.fix))
+    return projected
+
+def _norm(text: str) -> str:
+    return " ".join(text.lower().split())
+
+def dedupe_findings(findings: list[Finding]) -> list[Finding]:
+    """
+    Collapse the same problem reported in several files into one finding;
+    the other files are listed in `also_in`.
+    """
+    seen = {}
+    for f in findings:
+        key = (f.category, _norm(f.code), _norm(f.message))
+        if key in seen:
+            if f.filename != seen[key].filename and f.filename not in seen[key].also_in:
+                seen[key].also_in.append(f.filename)
+        else:
+            seen[key] = Finding(f.filename, f.category, f.severity, f.line,
+                                f.code, f.message, f.detail, f.fix, list(f.also_in))
+    return list(seen.values())
+
+def write_json(findings: list[Finding], path: str):
+    with open(path, "w", encoding="utf-8") as out:
+        json.dump([asdict(f) for f in findings], out, indent=2)
+
+SARIF_LEVEL = {"high": "error", "medium": "warning", "low": "note", "info": "none"}
+
+def write_sarif(findings: list[Finding], path: str):
+    """SARIF 2.1.0 log, one rule per review category."""
+    def location(filename, line):
+        region = {"startLine": line} if line else {}
+        return {"physicalLocation": {"artifactLocation": {"uri": filename}, "region": region}}
+
+    rules   = [{"id": c, "shortDescription": {"text": c.title()}} for c in REVIEW_SECTIONS]
+    results = [{
+        "ruleId":    f.category,
+        "level":     SARIF_LEVEL[f.severity],
+        "message":   {"text": f.message + (f"\nFix: {f.fix}" if f.fix else "")},
+        "locations": [location(f.filename, f.line)] + [location(o, None) for o in f.also_in]
+    } for f in findings if f.severity != "info"]
+
+    sarif = {
+        "$schema": "https://json.schemastore.org/sarif-2.1.0.json",
+        "version": "2.1.0",
+        "runs": [{"tool": {"driver": {"name": "Agentic GitHub Code Reviewer", "rules": rules}},
+                  "results": results}]
+    }
+    with open(path, "w", encoding="utf-8") as out:
+        json.dump(sarif, out, indent=2)
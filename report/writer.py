@@ -0,0 +1,55 @@
+# report/writer.py
+import os
+import shutil
+
+class ReportWriter:
+    """
+    Streams the markdown report to disk.
+    File sections are written to a spool directory as soon as each file
+    finishes (in any order); finish() writes header + executive summary and
+    then copies the sections in file order, so the full report never has
+    to exist as one string in memory.
+    """
+
+    def __init__(self, path: str):
+        self.path      = path
+        self.spool_dir = f"{path}.parts"
+
+    def reset(self):
+        """Drop sections left by an earlier run that wrote to the same path (fresh runs only)."""
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+
+    def write_section(self, index: int, filename: str, review: str, suggestion: str | None = None):
+        os.makedirs(self.spool_dir, exist_ok=True)
+        part = os.path.join(self.spool_dir, f"{index:06d}.md")
+        tmp  = f"{part}.tmp"
+        with open(tmp, "w", encoding="utf-8") as out:
+            out.write(render_section(filename, review, suggestion))
+        os.replace(tmp, part)
+
+    def finish(self, header: str, footer: str = "") -> str:
+        with open(self.path, "w", encoding="utf-8") as out:
+            out.write(header)
+            if os.path.isdir(self.spool_dir):
+                for name in sorted(os.listdir(self.spool_dir)):
+                    if not name.endswith(".md"):
+                        continue
+                    with open(os.path.join(self.spool_dir, name), encoding="utf-8") as part:
+                        shutil.copyfileobj(part, out)
+            out.write(footer)
+        shutil.rmtree(self.spool_dir, ignore_errors=True)
+        return self.path
+
+def render_section(filename: str, review: str, suggestion: str | None = None) -> str:
+    section = f"\n### `{filename}`\n{review}\n"
+    if suggestion:
+        section += f"\n**💡 Fix Suggestions:**\n{suggestion}\n"
+    return section + "\n---\n"
+
+def render_duplicate(representative: str, similarity: float, findings: list) -> str:
+    """Section body for a file that was reviewed through its duplicate."""
+    kind  = "exact duplicate" if similarity >= 1.0 else f"near-duplicate ({similarity:.0%} similar)"
+    lines = [f"_Not reviewed separately: {kind} of `{representative}`. Its findings, applied here:_", ""]
+    lines += [f"- **{f.category}** (line {f.line or '?'}): {f.message}"
+              for f in findings if f.severity != "info"] or ["None found."]
+    return "\n".join(lines)
@@ -0,0 +1,122 @@
+# scheduler.py
+import time
+import asyncio
+import contextvars
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from metrics import set_gauge, observe
+from config import LLM_CONCURRENCY
+
+# Who the current review belongs to: (tenant, priority). Set per repo by batch.py;
+# single reviews share the default tenant.
+_tenant = contextvars.ContextVar("review_tenant", default=("default", 0))
+
+def set_tenant(name: str, priority: int = 0) -> contextvars.Token:
+    return _tenant.set((name, priority))
+
+class FairScheduler:
+    """
+    Process-wide bound on LLM-heavy work (one slot per file worker / summary),
+    shared by every review running in this process. When slots are scarce,
+    waiters are served by priority (higher first), then by the tenant with the
+    fewest running and fewest served tasks — so concurrent repos interleave
+    instead of one repo's files queueing ahead of everything else.
+    """
+
+    def __init__(self, slots: int = LLM_CONCURRENCY):
+        self.slots    = max(1, slots)
+        self.busy     = 0
+        self._cond    = threading.Condition()
+        self._waiting = {}  # tenant -> [(priority, ticket)] in arrival order
+        self._running = {}
+        self._served  = {}
+
+    def _next_ticket(self):
+        tenant = min(self._waiting, key=lambda t: (-self._waiting[t][0][0],
+                                                   self._running.get(t, 0),
+                                                   self._served.get(t, 0)))
+        return tenant, self._waiting[tenant][0][1]
+
+    def acquire(self, tenant: str, priority: int = 0):
+        ticket = object()
+        start  = time.perf_counter()
+        with self._cond:
+            self._waiting.setdefault(tenant, []).append((priority, ticket))
+            while self.busy >= self.slots or self._next_ticket() != (tenant, ticket):
+                self._cond.wait()
+            self._waiting[tenant].pop(0)
+            if not self._waiting[tenant]:
+                del self._waiting[tenant]
+            self.busy += 1
+            self._running[tenant] = self._running.get(tenant, 0) + 1
+            self._served[tenant]  = self._served.get(tenant, 0) + 1
+            set_gauge("review_scheduler_busy_slots", self.busy, "Scheduler slots in use")
+            set_gauge("review_scheduler_waiting", sum(len(w) for w in self._waiting.values()),
+                      "Tasks waiting for a scheduler slot")
+        observe("review_scheduler_wait_seconds", time.perf_counter() - start, "Time waiting for a slot")
+
+    def release(self, tenant: str):
+        with self._cond:
+            self.busy -= 1
+            self._running[tenant] -= 1
+            if not self._running[tenant]:
+                del self._running[tenant]
+            set_gauge("review_scheduler_busy_slots", self.busy, "Scheduler slots in use")
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Hold one slot for the current tenant (see set_tenant) for the duration of the block."""
+        tenant, priority = _tenant.get()
+        self.acquire(tenant, priority)
+        try:
+            yield
+        finally:
+            self.release(tenant)
+
+SCHEDULER = FairScheduler()
+
+class RequestLimit:
+    """
+    Process-wide cap on LLM requests in flight. Scheduler slots bound the
+    tasks, but a task may fan out (review windows, digest groups); every
+    request, nested or not, holds one permit while it is on the wire.
+    """
+
+    def __init__(self, limit: int = LLM_CONCURRENCY):
+        self._sem  = threading.BoundedSemaphore(max(1, limit))
+        self._held = contextvars.ContextVar("llm_request_permit", default=False)
+
+    @contextmanager
+    def hold(self):
+        if self._held.get():  # re-entered by the same request (e.g. invoke_all → model)
+            yield
+            return
+        start = time.perf_counter()
+        self._sem.acquire()
+        observe("review_llm_request_wait_seconds", time.perf_counter() - start, "Time waiting for a request permit")
+        token = self._held.set(True)
+        try:
+            yield
+        finally:
+            self._held.reset(token)
+            self._sem.release()
+
+    @asynccontextmanager
+    async def ahold(self):
+        if self._held.get():
+            yield
+            return
+        # Poll instead of blocking a thread: a cancelled waiter must not take a permit later
+        start = time.perf_counter()
+        while not self._sem.acquire(blocking=False):
+            await asyncio.sleep(0.01)
+        observe("review_llm_request_wait_seconds", time.perf_counter() - start, "Time waiting for a request permit")
+        token = self._held.set(True)
+        try:
+            yield
+        finally:
+            self._held.reset(token)
+            self._sem.release()
+
+LLM_REQUESTS = RequestLimit()
@@ -0,0 +1,18 @@
+# tests/test_dedup.py
+from tools.dedup import group_duplicates
+
+BODY = "\n".join(f"def handler_{i}(request):\n    value = request.get('field_{i}')\n    return value * {i}"
+                 for i in range(30))
+
+def _file(name: str, content: str) -> dict:
+    return {"filename": name, "content": content, "patch": ""}
+
+def test_exact_copy_of_near_copy_joins_the_representative_group():
+    near  = BODY.replace("handler_29", "handler_twenty_nine")
+    files = [_file("a.py", BODY), _file("b.py", near), _file("c.py", near)]
+
+    groups = group_duplicates(files, threshold=0.8)
+
+    assert list(groups) == [0]
+    assert [m["index"] for m in groups[0]] == [1, 2]
+    assert groups[0][1]["similarity"] == groups[0][0]["similarity"] < 1.0
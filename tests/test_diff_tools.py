@@ -0,0 +1,43 @@
+# tests/test_diff_tools.py
+from tools.diff_tools import changed_lines, line_excerpt, hunk_excerpt, review_content
+
+PATCH = """@@ -1,4 +1,5 @@
+ import os
+-x = 1
++x = 2
++y = 3
+ def f():
+@@ -20,3 +21,2 @@ def g():
+ a = 1
+-b = 2
+ c = 3
+\\ No newline at end of file"""
+
+CONTENT = "\n".join(f"line {n}" for n in range(1, 31))
+
+def test_changed_lines_maps_additions_and_deletions_to_new_file_lines():
+    # 2, 3: added; 22: where "b = 2" was deleted
+    assert changed_lines(PATCH) == {2, 3, 22}
+
+def test_changed_lines_empty_patch():
+    assert changed_lines("") == set()
+
+def test_line_excerpt_merges_windows_and_marks_wanted_lines():
+    excerpt = line_excerpt(CONTENT, {5, 7, 20}, context=1, mark=">")
+    blocks  = excerpt.split("\n   ...\n")
+    assert len(blocks) == 2
+    assert blocks[0].splitlines() == [
+        "     4 | line 4", ">    5 | line 5", "     6 | line 6",
+        ">    7 | line 7", "     8 | line 8",
+    ]
+    assert blocks[1].splitlines()[1] == ">   20 | line 20"
+
+def test_line_excerpt_ignores_out_of_range_lines():
+    assert line_excerpt(CONTENT, {0, 99}, context=2) == ""
+
+def test_hunk_excerpt_marks_changed_lines():
+    marked = [l for l in hunk_excerpt(CONTENT, PATCH, context=0).splitlines() if l.startswith("+")]
+    assert [int(l[1:].split("|")[0]) for l in marked] == [2, 3, 22]
+
+def test_review_content_falls_back_to_whole_file_without_patch():
+    assert review_content({"content": "a\nb", "patch": ""}).count("\n") == 1
@@ -0,0 +1,83 @@
+# tests/test_findings.py
+from report.findings import Finding, split_sections, parse_findings, project_findings
+
+REVIEW = """**BUGS (Highest Priority)**
+- Line: 12
+- Code: `total = total / count`
+- Problem: Division by zero when `items` is empty
+- Why it is a bug: `count` starts at 0
+- Suggested Fix: return 0 early when `count == 0`
+
+- Line: L30-32
+- Code:
+```python
+except:
+    pass
+```
+- Problem: Bare except hides errors
+- Why it is a bug: swallows KeyboardInterrupt
+- Suggested Fix: catch `ValueError`
+
+### SECURITY
+None found.
+
+PERFORMANCE
+- Line: `for x in rows: rows.index(x)`
+- Code: rows.index(x)
+- Issue: quadratic lookup
+- Cost: O(n²)
+- Fix: enumerate(rows)
+
+POSITIVE OBSERVATIONS
+- Line: 1
+- Code: import logging
+- What is done well: uses logging
+- Why it is good practice: configurable output
+"""
+
+def test_split_sections_tolerates_markdown_headers():
+    sections = split_sections(REVIEW)
+    assert list(sections) == ["BUGS", "SECURITY", "PERFORMANCE", "POSITIVE OBSERVATIONS"]
+    assert sections["SECURITY"] == "None found."
+
+def test_parse_findings_fields_and_line_numbers():
+    findings = parse_findings("app.py", REVIEW)
+    assert [(f.category, f.severity, f.line) for f in findings] == [
+        ("BUGS", "high", 12),
+        ("BUGS", "high", 30),
+        ("PERFORMANCE", "medium", None),   # a snippet, not a number
+        ("POSITIVE OBSERVATIONS", "info", 1),
+    ]
+    first = findings[0]
+    assert first.code == "total = total / count"
+    assert first.message == "Division by zero when `items` is empty"
+    assert first.detail == "`count` starts at 0"
+    assert first.fix == "return 0 early when `count == 0`"
+
+def test_parse_findings_strips_code_fences():
+    assert parse_findings("app.py", REVIEW)[1].code == "except:\n    pass"
+
+def test_parse_findings_inline_fence_and_bold_values():
+    review   = "BUGS\n- Line: 3\n- Code: ```python\nx = 1\n```\n- Problem: **shadowed name**\n"
+    findings = parse_findings("app.py", review)
+    assert [(f.code, f.message) for f in findings] == [("x = 1", "shadowed name")]
+
+def test_parse_findings_skips_empty_sections():
+    assert parse_findings("app.py", "BUGS\nNone found.\n\nSECURITY\nNot provable from given code.") == []
+
+def _finding(line, code):
+    return Finding("a.py", "BUGS", "high", line, code, "problem")
+
+def test_project_findings_exact_copy_keeps_lines():
+    projected = project_findings([_finding(12, "x = 1")], "b.py")
+    assert (projected[0].filename, projected[0].line) == ("b.py", 12)
+
+def test_project_findings_near_copy_relocates_by_snippet():
+    content   = "import os\n\ndef f():\n    x = 1\n    return x\n"
+    projected = project_findings([_finding(12, "x = 1\nreturn x"), _finding(3, "")], "b.py", content)
+    assert [f.line for f in projected] == [4, None]
+
+def test_project_findings_near_copy_needs_a_whole_line_match():
+    content   = "def f(value):\n    return value_or_default(value)\n"
+    projected = project_findings([_finding(7, "return value")], "b.py", content)
+    assert projected[0].line is None
@@ -0,0 +1,82 @@
+# tools/blob_cache.py
+import os
+import threading
+from config import CACHE_DIR, BLOB_CACHE_MAX_MB
+
+BLOB_DIR  = os.path.join(CACHE_DIR, "blobs")
+MAX_BYTES = BLOB_CACHE_MAX_MB * 1024 * 1024
+
+_lock       = threading.Lock()
+_total_size = None  # bytes on disk, computed lazily on first write
+
+def _blob_path(sha: str) -> str:
+    return os.path.join(BLOB_DIR, sha[:2], sha)
+
+def _scan() -> list[tuple[float, int, str]]:
+    """(mtime, size, path) for every cached blob."""
+    entries = []
+    for root, _, names in os.walk(BLOB_DIR):
+        for name in names:
+            path = os.path.join(root, name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+    return entries
+
+def get_blob(sha: str) -> str | None:
+    """Cached file content for a git blob SHA, or None."""
+    if not sha:
+        return None
+    path = _blob_path(sha)
+    try:
+        with open(path, encoding="utf-8") as f:
+            content = f.read()
+    except FileNotFoundError:
+        return None
+    # Touch so eviction is least-recently-USED, not least-recently-written
+    try:
+        os.utime(path)
+    except FileNotFoundError:
+        pass  # evicted by another thread since the read; the content is still good
+    return content
+
+def put_blob(sha: str, content: str):
+    """Store content under its blob SHA, evicting old blobs past the size cap."""
+    global _total_size
+    if not sha:
+        return
+    path = _blob_path(sha)
+    if os.path.exists(path):
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = content.encode("utf-8")
+    tmp  = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+    with _lock:
+        if _total_size is None:
+            _total_size = sum(size for _, size, _ in _scan())
+        else:
+            _total_size += len(data)
+        if _total_size > MAX_BYTES:
+            _evict()
+
+def _evict():
+    """Drop least-recently-used blobs until we are back under 90% of the cap."""
+    global _total_size
+    entries = sorted(_scan())
+    total   = sum(size for _, size, _ in entries)
+    target  = MAX_BYTES * 0.9
+    for _, size, path in entries:
+        if total <= target:
+            break
+        try:
+            os.remove(path)
+            total -= size
+        except FileNotFoundError:
+            pass
+    _total_size = total
@@ -0,0 +1,85 @@
+# tools/context_packer.py
+from langchain_core.prompts import ChatPromptTemplate
+from config import MODEL_CONTEXT_TOKENS, COMPLETION_TOKENS, WINDOW_OVERLAP_LINES
+
+SAFETY_MARGIN = 64  # tokenizer mismatch: our count vs. the local model's
+
+def _load_encoder():
+    # tiktoken ships with langchain-openai; the BPE file may be unavailable offline
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        return None
+
+_encoder = _load_encoder()
+
+def count_tokens(text: str) -> int:
+    if _encoder is not None:
+        return len(_encoder.encode(text, disallowed_special=()))
+    return int(len(text) / 3.5) + 1
+
+def prompt_budget(prompt: ChatPromptTemplate, completion: int = COMPLETION_TOKENS) -> int:
+    """Tokens left for the variable parts of `prompt` after system text and the answer."""
+    empty = {name: "" for name in prompt.input_variables}
+    fixed = sum(count_tokens(m.content) + 4 for m in prompt.format_messages(**empty))
+    return max(MODEL_CONTEXT_TOKENS - completion - fixed - SAFETY_MARGIN, 256)
+
+def fit(text: str, budget: int, marker: str = "\n... (truncated)") -> str:
+    """Cut `text` at a line boundary so it fits in `budget` tokens."""
+    if count_tokens(text) <= budget:
+        return text
+    kept, used = [], count_tokens(marker)
+    for line in text.splitlines():
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept) + marker
+
+def number_lines(content: str, start: int = 1) -> list[str]:
+    """Same ' NNNNN | code' layout as PR hunk excerpts, so findings can cite lines."""
+    return [f" {n:>5} | {line}" for n, line in enumerate(content.splitlines(), start)]
+
+def split_windows(lines: list[str], budget: int,
+                  overlap: int = WINDOW_OVERLAP_LINES) -> list[str]:
+    """
+    Overlapping windows of whole lines, each within `budget` tokens.
+    Consecutive windows share `overlap` lines so nothing at a seam is lost.
+    """
+    costs   = [count_tokens(l) + 1 for l in lines]
+    windows = []
+    start   = 0
+    while start < len(lines):
+        end, used = start, 0
+        while end < len(lines) and (used + costs[end] <= budget or end == start):
+            used += costs[end]
+            end  += 1
+        windows.append("\n".join(lines[start:end]))
+        if end >= len(lines):
+            break
+        start = max(end - overlap, start + 1)
+    return windows
+
+def allocate(budget: int, parts: dict[str, str], weights: dict[str, float]) -> dict[str, int]:
+    """
+    Split `budget` across named parts by weight; whatever a small part does
+    not need is handed to the others.
+    """
+    need  = {k: count_tokens(v) for k, v in parts.items()}
+    alloc = {k: 0 for k in parts}
+    left, open_parts = budget, set(parts)
+    while open_parts and left > 0:
+        total_w = sum(weights[k] for k in open_parts)
+        share   = {k: int(left * weights[k] / total_w) for k in open_parts}
+        done    = {k for k in open_parts if need[k] - alloc[k] <= share[k]}
+        if not done:
+            for k in open_parts:
+                alloc[k] += share[k]
+            break
+        for k in done:
+            left     -= need[k] - alloc[k]
+            alloc[k]  = need[k]
+        open_parts -= done
+    return alloc
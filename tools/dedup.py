@@ -0,0 +1,82 @@
+# tools/dedup.py
+import re
+import hashlib
+from tools.diff_tools import review_content
+from tools.file_store import with_content
+from config import NEAR_DUP_THRESHOLD
+
+NUM_PERM      = 64
+BANDS         = 16   # 16 bands × 4 rows: pairs above ~0.5 Jaccard become candidates
+SHINGLE_SIZE  = 5
+MIN_SHINGLES  = 20   # shorter files only match exactly
+MERSENNE      = (1 << 61) - 1
+VENDORED_RE   = re.compile(r"(^|/)(vendor|vendored|third_party|external|site-packages|_vendor)/")
+LINE_NO_RE    = re.compile(r"^[ +>]\s*\d+ \| ", re.M)
+TOKEN_RE      = re.compile(r"\w+|[^\w\s]")
+COMMENT_RE    = re.compile(r"#[^\n]*")
+
+# Fixed (a, b) per permutation so signatures are comparable across runs
+_PERMS = [
+    (int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), "big") % MERSENNE | 1,
+     int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), "big") % MERSENNE)
+    for i in range(NUM_PERM)
+]
+
+def tokens(text: str) -> list[str]:
+    """Code tokens without line-number gutters, comments or layout."""
+    return TOKEN_RE.findall(COMMENT_RE.sub("", LINE_NO_RE.sub("", text)))
+
+def minhash(toks: list[str]) -> list[int] | None:
+    shingles = {" ".join(toks[i:i + SHINGLE_SIZE]) for i in range(len(toks) - SHINGLE_SIZE + 1)}
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles]
+    return [min((a * h + b) % MERSENNE for h in hashes) for a, b in _PERMS]
+
+def similarity(a: list[int], b: list[int]) -> float:
+    """Estimated Jaccard similarity of the two shingle sets."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+def _preference(f: dict) -> tuple:
+    """Representative = the copy that is least likely vendored, then the shallowest path."""
+    return (bool(VENDORED_RE.search(f["filename"])), f["filename"].count("/"), f["filename"])
+
+def group_duplicates(files: list[dict], threshold: float = NEAR_DUP_THRESHOLD) -> dict[int, list[dict]]:
+    """
+    representative index -> [{"index", "similarity"}] of the files that
+    duplicate it. Exact: identical text as the reviewer would see it.
+    Near: MinHash over normalized token shingles, LSH-banded, and each member
+    checked against its representative (no transitive chains).
+    """
+    order  = sorted(range(len(files)), key=lambda i: _preference(files[i]))
+    exact  = {}   # text hash -> (representative index, similarity to it)
+    groups = {}
+    bucket = {}   # (band, band hash) -> representative indices
+    sigs   = {}
+    rows   = NUM_PERM // BANDS
+
+    for i in order:
+        text = review_content(with_content(files[i]))
+        key  = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        if key in exact:
+            rep, sim = exact[key]
+            groups[rep].append({"index": i, "similarity": sim})
+            continue
+        exact[key] = (i, 1.0)
+
+        sig   = minhash(tokens(text)) if threshold < 1.0 else None
+        bands = [(b, tuple(sig[b * rows:(b + 1) * rows])) for b in range(BANDS)] if sig else []
+        best  = max(({r for band in bands for r in bucket.get(band, [])}),
+                    key=lambda r: similarity(sig, sigs[r]), default=None)
+        if best is not None and similarity(sig, sigs[best]) >= threshold:
+            sim        = round(similarity(sig, sigs[best]), 2)
+            exact[key] = (best, sim)  # later exact copies of this member join its representative
+            groups[best].append({"index": i, "similarity": sim})
+            continue
+
+        groups[i] = []
+        if sig:
+            sigs[i] = sig
+            for band in bands:
+                bucket.setdefault(band, []).append(i)
+    return {rep: members for rep, members in groups.items() if members}
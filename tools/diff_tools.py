@@ -0,0 +1,68 @@
+# tools/diff_tools.py
+import re
+from tools.context_packer import number_lines
+from config import PR_CONTEXT_LINES
+
+HUNK_RE = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+
+def changed_lines(patch: str) -> set[int]:
+    """New-file line numbers touched by a unified diff (added lines, or the spot of a deletion)."""
+    changed = set()
+    line_no = 0
+    for line in patch.splitlines():
+        hunk = HUNK_RE.match(line)
+        if hunk:
+            line_no = int(hunk.group(1))
+            continue
+        if line.startswith("+"):
+            changed.add(line_no)
+            line_no += 1
+        elif line.startswith("-"):
+            changed.add(max(line_no, 1))
+        elif not line.startswith("\\"):  # "\ No newline at end of file"
+            line_no += 1
+    return changed
+
+def hunk_excerpt(content: str, patch: str, context: int = PR_CONTEXT_LINES) -> str:
+    """
+    Numbered excerpt of `content` covering the changed lines plus `context`
+    lines around each. Changed lines are marked with '+'.
+    """
+    return line_excerpt(content, changed_lines(patch), context)
+
+def line_excerpt(content: str, wanted: set[int], context: int, mark: str = "+") -> str:
+    """Numbered excerpt of the `wanted` lines plus `context` lines around each, marked with `mark`."""
+    lines  = content.splitlines()
+    wanted = {n for n in wanted if 1 <= n <= len(lines)}
+    if not wanted:
+        return ""
+
+    # Merge overlapping [n - context, n + context] windows
+    windows = []
+    for n in sorted(wanted):
+        lo, hi = max(1, n - context), min(len(lines), n + context)
+        if windows and lo <= windows[-1][1] + 1:
+            windows[-1][1] = max(windows[-1][1], hi)
+        else:
+            windows.append([lo, hi])
+
+    parts = []
+    for lo, hi in windows:
+        parts.append("\n".join(
+            f"{mark if n in wanted else ' '}{n:>5} | {lines[n - 1]}"
+            for n in range(lo, hi + 1)
+        ))
+    return "\n   ...\n".join(parts)
+
+def review_content(f: dict) -> str:
+    """
+    What the LLM should see for a file, with line numbers:
+    changed hunks in PR mode, else the whole file.
+    """
+    if f.get("patch"):
+        excerpt = hunk_excerpt(f["content"], f["patch"])
+        if excerpt:
+            return excerpt
+    if f["content"]:
+        return "\n".join(number_lines(f["content"]))
+    return f["patch"]
@@ -0,0 +1,42 @@
+# tools/file_store.py
+import json
+import hashlib
+from functools import lru_cache
+from tools.blob_cache import get_blob, put_blob
+from tools.github_tools import get_file_content
+from checkpoints import get_result_store
+
+def load_content(f: dict) -> str:
+    """
+    Body of a file reference ({"filename", "sha", "repo", "ref", ...}) from the
+    blob cache; if it was evicted meanwhile, downloaded again and re-cached.
+    """
+    content = get_blob(f["sha"])
+    if content is None:
+        owner, repo = f["repo"].split("/", 1)
+        content     = get_file_content(owner, repo, f["filename"], f["ref"])
+        if content:  # a failed download ("") must not be cached as an empty file
+            put_blob(f["sha"], content)
+    return content
+
+def with_content(f: dict) -> dict:
+    """The reference plus its body, for the one stage that is working on it."""
+    return f if "content" in f else {**f, "content": load_content(f)}
+
+def put_text(text: str) -> str:
+    """Park a large per-file result (e.g. a review) on disk; returns its key."""
+    key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+    get_result_store().put_text(key, text)
+    return key
+
+def get_text(key: str) -> str:
+    # Unlike file bodies these cannot be fetched again, so a missing one is an error
+    text = get_result_store().get_text(key)
+    if text is None:
+        raise KeyError(f"stored text {key} expired or missing")
+    return text
+
+@lru_cache(maxsize=8)
+def get_json(key: str):
+    """Parsed JSON stored with put_text, memoised so a run's workers share one read-only copy."""
+    return json.loads(get_text(key))
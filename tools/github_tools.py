@@ -2,20 +2,61 @@
 import requests
 import re
 import base64
-from config import GITHUB_TOKEN
+import hashlib
+import json
+import os
+import time
+import tarfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from metrics import inc, set_gauge, update, bind
+from config import (GITHUB_TOKEN, FETCH_WORKERS, FETCH_RETRIES, RATE_LIMIT_MAX_WAIT, CACHE_DIR,
+                    GITHUB_API_URL)
 
 HEADERS = {
     "Authorization": f"token {GITHUB_TOKEN}",
     "Accept": "application/vnd.github.v3+json"
 }
 
+class GitHubError(requests.HTTPError):
+    """A GitHub lookup that did not return 200; `status` is the HTTP status GitHub answered."""
+
+    def __init__(self, message: str, status: int):
+        super().__init__(message)
+        self.status = status
+
+def http_status(error: requests.HTTPError) -> int | None:
+    """HTTP status behind a GitHubError or a raise_for_status() error, if known."""
+    if isinstance(error, GitHubError):
+        return error.status
+    return error.response.status_code if error.response is not None else None
+
+def _make_session() -> requests.Session:
+    """One keep-alive session shared by every GitHub call (and every worker thread)."""
+    session = requests.Session()
+    session.headers.update(HEADERS)
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(FETCH_WORKERS, 10))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+SESSION = _make_session()
+ETAG_DIR = os.path.join(CACHE_DIR, "etags")
+
 #update CODE_EXTENSIONS as per requirements
 CODE_EXTENSIONS = {
     ".py",
 }
+MAX_BLOB_SIZE = 200000  # bytes, larger files are skipped
+
 
+def _is_code_file(path: str, size: int) -> bool:
+    ext = "." + path.split(".")[-1] if "." in path else ""
+    return ext in CODE_EXTENSIONS and size < MAX_BLOB_SIZE
 
 def parse_repo_url(url: str) -> tuple[str, str]:
+    """owner/repo from a repo URL or a pull-request URL (.../pull/N)."""
     pattern = r"github\.com/([^/]+)/([^/\s]+)"
     match = re.search(pattern, url)
     if not match:
@@ -24,11 +65,107 @@ def parse_repo_url(url: str) -> tuple[str, str]:
     repo  = match.group(2).rstrip("/").split("/")[0]
     return owner, repo
 
+def parse_pr_number(url: str) -> int:
+    """PR number from https://github.com/owner/repo/pull/N, 0 for plain repo URLs."""
+    match = re.search(r"github\.com/[^/]+/[^/\s]+/pull/(\d+)", url)
+    return int(match.group(1)) if match else 0
+
+def _rate_limit_wait(response: requests.Response, attempt: int) -> float | None:
+    """Seconds to wait before retrying a 403/429, or None if it is not retryable."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after and retry_after.isdigit():
+        return float(retry_after)
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        reset = int(response.headers.get("X-RateLimit-Reset", "0"))
+        return max(reset - time.time(), 0) + 1
+    if response.status_code == 429:
+        return 2 ** attempt
+    # plain 403 = permission problem, retrying will not help
+    return None
+
+def _count_request(response: requests.Response):
+    status    = str(response.status_code)
+    remaining = response.headers.get("X-RateLimit-Remaining")
+    inc("github_requests_total", 1, "GitHub API requests", status=status)
+    if remaining is not None:
+        set_gauge("github_rate_limit_remaining", int(remaining), "GitHub rate-limit headroom")
+
+    def add(github):
+        github["requests"] += 1
+        github["by_status"][status] = github["by_status"].get(status, 0) + 1
+        if remaining is not None:
+            github["rate_limit_remaining"] = int(remaining)
+    update("github", add)
+
+def github_get(url: str, **kwargs) -> requests.Response:
+    """GET through the shared session with retry/backoff on rate limits and 5xx."""
+    kwargs.setdefault("timeout", 30)
+    for attempt in range(FETCH_RETRIES + 1):
+        last_try = attempt == FETCH_RETRIES
+        try:
+            response = SESSION.get(url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if last_try:
+                raise
+            print(f" Connection error ({e.__class__.__name__}), retrying: {url}")
+            time.sleep(2 ** attempt)
+            continue
+        # Every response counts, including the rate-limited / 5xx ones that get retried
+        _count_request(response)
+
+        if response.status_code in (403, 429) and not last_try:
+            wait = _rate_limit_wait(response, attempt)
+            if wait is not None and wait <= RATE_LIMIT_MAX_WAIT:
+                print(f" Rate limited ({response.status_code}), sleeping {wait:.0f}s")
+                time.sleep(wait)
+                continue
+        elif response.status_code >= 500 and not last_try:
+            time.sleep(2 ** attempt)
+            continue
+
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None and int(remaining) < FETCH_WORKERS:
+            print(f" ⚠️ GitHub rate limit nearly exhausted: {remaining} requests left")
+        return response
+    return response
+
+def github_get_json(url: str) -> tuple[int, dict]:
+    """
+    Conditional GET: replays the stored ETag as If-None-Match.
+    A 304 is free against the rate limit and returns the cached body.
+    Returns (status_code, json_body) — body is {} on errors.
+    """
+    key       = hashlib.sha1(url.encode()).hexdigest()
+    etag_path = os.path.join(ETAG_DIR, f"{key}.json")
+    cached    = None
+    headers   = {}
+    if os.path.exists(etag_path):
+        with open(etag_path, encoding="utf-8") as f:
+            cached = json.load(f)
+        headers["If-None-Match"] = cached["etag"]
+
+    response = github_get(url, headers=headers)
+    if response.status_code == 304 and cached:
+        return 200, cached["body"]
+    if response.status_code != 200:
+        return response.status_code, {}
+
+    body = response.json()
+    etag = response.headers.get("ETag")
+    if etag:
+        os.makedirs(ETAG_DIR, exist_ok=True)
+        # Per thread, not just per process: two fetch threads may refresh the same URL at once
+        tmp = f"{etag_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"etag": etag, "body": body}, f)
+        os.replace(tmp, etag_path)
+    return 200, body
+
 def get_repo_info(owner: str, repo: str) -> dict:
-    url = f"https://api.github.com/repos/{owner}/{repo}"
-    response = requests.get(url, headers=HEADERS)
-    response.raise_for_status()
-    data = response.json()
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}"
+    status, data = github_get_json(url)
+    if status != 200:
+        raise GitHubError(f"❌ Could not load repo {owner}/{repo} ({status})", status)
     return {
         "name":           data["name"],
         "description":    data.get("description") or "No description.",
@@ -39,13 +176,16 @@ def get_repo_info(owner: str, repo: str) -> dict:
         "owner":          data["owner"]["login"]
     }
 
-def get_repo_tree(owner: str, repo: str, branch: str = "main") -> list[str]:
-    """Get ALL file paths recursively across ALL folders."""
+def get_repo_tree(owner: str, repo: str, branch: str = "main") -> list[dict]:
+    """
+    Get ALL code blobs recursively across ALL folders.
+    Returns [{"path", "sha", "size"}] — the blob SHA keys the local blob cache.
+    """
     for b in [branch, "main", "master"]:
-        url = f"https://api.github.com/repos/{owner}/{repo}/git/trees/{b}?recursive=1"
-        response = requests.get(url, headers=HEADERS)
-        if response.status_code == 200:
-            tree = response.json().get("tree", [])
+        url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/git/trees/{b}?recursive=1"
+        status, data = github_get_json(url)
+        if status == 200:
+            tree = data.get("tree", [])
             
             # Debug print everything found
             print(f"\n   🌳 Raw tree has {len(tree)} total items")
@@ -55,22 +195,72 @@ def get_repo_tree(owner: str, repo: str, branch: str = "main") -> list[str]:
                 if item["type"] != "blob":
                     continue
                 path = item["path"]
-                ext  = "." + path.split(".")[-1] if "." in path else ""
                 size = item.get("size", 0)
-                
-                if ext in CODE_EXTENSIONS and size < 200000:
-                    filtered.append(path)
+
+                if _is_code_file(path, size):
+                    filtered.append({"path": path, "sha": item["sha"], "size": size})
                     print(f"      ✅ {path}  ({size} bytes)")
                 else:
-                    print(f"      ⏭️  skipped: {path}  ext={ext}")
+                    print(f"      ⏭️  skipped: {path}  ({size} bytes)")
 
             return filtered
     return []
 
-def get_file_content(owner: str, repo: str, filepath: str) -> str:
+def get_head_sha(owner: str, repo: str, ref: str) -> str:
+    """Commit SHA a branch/tag/ref currently points at."""
+    url      = f"{GITHUB_API_URL}/repos/{owner}/{repo}/commits/{ref}"
+    response = github_get(url, headers={"Accept": "application/vnd.github.sha"})
+    response.raise_for_status()
+    return response.text.strip()
+
+def get_pull_request(owner: str, repo: str, number: int) -> dict:
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls/{number}"
+    status, data = github_get_json(url)
+    if status != 200:
+        raise GitHubError(f"❌ Could not load PR #{number} of {owner}/{repo} ({status})", status)
+    return {
+        "title":         data["title"],
+        "description":   data.get("body") or "No description.",
+        "author":        data["user"]["login"],
+        "base_branch":   data["base"]["ref"],
+        "head_branch":   data["head"]["ref"],
+        "head_sha":      data["head"]["sha"],
+        "changed_files": data["changed_files"],
+        "additions":     data["additions"],
+        "deletions":     data["deletions"],
+        "state":         data["state"]
+    }
+
+def get_pull_files(owner: str, repo: str, number: int) -> list[dict]:
+    """Changed code files of a PR with their unified diff (`patch`)."""
+    files = []
+    for page in range(1, 31):  # GitHub caps this listing at 3000 files
+        url = (f"{GITHUB_API_URL}/repos/{owner}/{repo}/pulls/{number}/files"
+               f"?per_page=100&page={page}")
+        response = github_get(url)
+        response.raise_for_status()
+        batch = response.json()
+        for item in batch:
+            if _is_code_file(item["filename"], 0):
+                files.append({
+                    "filename":  item["filename"],
+                    "status":    item["status"],
+                    "sha":       item["sha"],
+                    "additions": item["additions"],
+                    "deletions": item["deletions"],
+                    # GitHub omits the patch for very large diffs
+                    "patch":     item.get("patch", "")
+                })
+        if len(batch) < 100:
+            break
+    return files
+
+def get_file_content(owner: str, repo: str, filepath: str, ref: str = "") -> str:
     """Fetch content of a single file via GitHub contents API."""
-    url = f"https://api.github.com/repos/{owner}/{repo}/contents/{filepath}"
-    response = requests.get(url, headers=HEADERS)
+    url = f"{GITHUB_API_URL}/repos/{owner}/{repo}/contents/{filepath}"
+    if ref:
+        url += f"?ref={ref}"
+    response = github_get(url)
     if response.status_code != 200:
         print(f" Failed to load: {filepath} ({response.status_code})")
         return ""
@@ -82,3 +272,50 @@ def get_file_content(owner: str, repo: str, filepath: str) -> str:
     except Exception as e:
         print(f" Decode error {filepath}: {e}")
         return ""
+
+def fetch_files(owner: str, repo: str, paths: list[str], ref: str = "",
+                workers: int = FETCH_WORKERS):
+    """
+    Fetch many files concurrently over the pooled session.
+    Yields (path, content) pairs in the same order as `paths`, as they arrive.
+    """
+    if not paths:
+        return
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(paths)))) as pool:
+        contents = pool.map(bind(lambda p: get_file_content(owner, repo, p, ref)), paths)
+        yield from zip(paths, contents)
+
+def fetch_archive_files(owner: str, repo: str, branch: str, paths: list[str] | None = None):
+    """
+    Download the branch tarball in ONE request and stream-decompress it.
+    Only code files (CODE_EXTENSIONS, MAX_BLOB_SIZE) are read, nothing touches disk
+    and neither the archive nor its files are ever held in memory together.
+    Yields (path, content) in archive order; with `paths`, only those files
+    (requested paths missing from the archive are yielded last, empty).
+    """
+    url      = f"{GITHUB_API_URL}/repos/{owner}/{repo}/tarball/{branch}"
+    response = github_get(url, stream=True, timeout=120)
+    response.raise_for_status()
+    response.raw.decode_content = True
+
+    wanted = set(paths) if paths is not None else None
+    found  = 0
+    with response, tarfile.open(fileobj=response.raw, mode="r|gz") as archive:
+        for member in archive:
+            if not member.isfile():
+                continue
+            # strip the "<owner>-<repo>-<sha>/" prefix GitHub adds
+            path = member.name.split("/", 1)[-1]
+            if wanted is not None and path not in wanted:
+                continue
+            if not _is_code_file(path, member.size):
+                continue
+            data = archive.extractfile(member).read()
+            found += 1
+            if wanted is not None:
+                wanted.discard(path)
+            yield path, data.decode("utf-8", errors="ignore")
+
+    print(f" Loaded {found} files from archive: {owner}/{repo}@{branch}")
+    for path in sorted(wanted or ()):
+        yield path, ""